@@ -0,0 +1,463 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+from multipart.multipart import MultipartParser, parse_options_header
+
+import metrics
+from batch import AUDIO_EXTENSIONS
+from deadline import Cancelled
+from extraction import is_fallback
+from fixed_agents import AnalysisAgent, TranscriptionAgent
+from fusion import fuse_sources
+from jobs import DONE, get_job_queue
+from ratelimit import BATCH, INTERACTIVE
+
+load_dotenv()
+
+MAX_UPLOAD_BYTES = int(os.getenv('MEETINGMIND_API_MAX_UPLOAD_MB', '500')) * 1048576
+# Text fields and JSON bodies are held in memory; files never are
+MAX_FIELD_BYTES = int(os.getenv('MEETINGMIND_API_MAX_FIELD_MB', '10')) * 1048576
+MAX_BATCH_ITEMS = int(os.getenv('MEETINGMIND_API_MAX_BATCH_ITEMS', '100'))
+READ_BLOCK = 1 << 16
+
+MEETING_TYPES = ("general", "standup", "planning", "retrospective")
+# Same order and labels as the UI: a typed transcript wins over Whisper output
+SOURCES = (
+    ("transcript", "MEETING TRANSCRIPT", "Text Transcript"),
+    ("audio_transcript", "AUDIO TRANSCRIPTION", "Audio Recording"),
+    ("notes", "ADDITIONAL CONTEXT", "Context Notes"),
+)
+
+logger = logging.getLogger("meetingmind.api")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadForm:
+    # A multipart body parsed as it arrives: file parts are written straight
+    # to the request's temp directory, text fields kept up to MAX_FIELD_BYTES
+    def __init__(self, directory):
+        self.directory = directory
+        self.fields = {}
+        self.files = []
+        self._headers = {}
+        self._header_name = b""
+        self._header_text = b""
+        self._name = None
+        self._value = None
+        self._file = None
+
+    def parser(self, boundary):
+        return MultipartParser(boundary, {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        })
+
+    def _part_begin(self):
+        self._headers = {}
+
+    def _header_field(self, data, start, end):
+        self._header_name += data[start:end]
+
+    def _header_value(self, data, start, end):
+        self._header_text += data[start:end]
+
+    def _header_end(self):
+        self._headers[self._header_name.lower()] = self._header_text
+        self._header_name = self._header_text = b""
+
+    def _headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = params.get(b"name", b"").decode("utf-8", "replace")
+        filename = params.get(b"filename")
+        if filename is None:
+            self._value = bytearray()
+            return
+        filename = os.path.basename(filename.decode("utf-8", "replace").replace("\\", "/")) or "upload"
+        extension = os.path.splitext(filename)[1].lower()
+        # Whisper goes by the extension, so it is kept; the rest of the name is not trusted
+        path = os.path.join(self.directory, f"{len(self.files)}{extension if extension[1:].isalnum() else ''}")
+        self._file = open(path, 'wb')
+        self.files.append({"name": self._name, "filename": filename, "path": path})
+
+    def _part_data(self, data, start, end):
+        if self._file is not None:
+            self._file.write(data[start:end])
+            return
+        if len(self._value) + end - start > MAX_FIELD_BYTES:
+            raise ApiError(413, f"Field '{self._name}' is larger than {MAX_FIELD_BYTES} bytes")
+        self._value += data[start:end]
+
+    def _part_end(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        else:
+            self.fields[self._name] = self._value.decode("utf-8", "replace")
+            self._value = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def text(self, upload):
+        with open(upload["path"], encoding='utf-8', errors='replace') as text_file:
+            return text_file.read()
+
+
+def process_meeting(transcription_agent, analysis_agent, meeting, on_event=None, deadline=None):
+    # Runs on a job worker: transcribe the recording if there is one, fuse it
+    # with the text sources and analyze the result
+    meeting = dict(meeting)
+    if meeting.get("audio_path"):
+        transcript = transcription_agent.transcribe_file(meeting["audio_path"], on_event=on_event, deadline=deadline)
+        if transcript == "Transcription failed":
+            raise RuntimeError(transcript)
+        meeting["audio_transcript"] = transcript
+    sources = [(label, meeting[key]) for key, label, _ in SOURCES if (meeting.get(key) or "").strip()]
+    sources_used = [used for key, _, used in SOURCES if (meeting.get(key) or "").strip()]
+    content = fuse_sources(sources)["content"]
+    if not content.strip():
+        raise ValueError("No meeting content")
+    analysis = analysis_agent.analyze_meeting_multi_source(content, meeting["meeting_type"], sources_used,
+                                                           on_event=on_event, deadline=deadline)
+    result = {"analysis": analysis, "sources_used": sources_used, "fallback": is_fallback(analysis)}
+    if meeting.get("audio_transcript"):
+        result["transcript"] = meeting["audio_transcript"]
+    return result
+
+
+def process_item(transcription_agent, analysis_agent, meeting, on_event=None, deadline=None):
+    # One batch line, shaped like batch.py's output records
+    started = time.monotonic()
+    record = {"id": meeting["id"]}
+    try:
+        result = process_meeting(transcription_agent, analysis_agent, meeting, on_event, deadline)
+        if result["fallback"]:
+            record["analysis"] = result["analysis"]
+            raise RuntimeError("Analysis failed")
+        record.update(status="ok", **result)
+    except Cancelled:
+        raise
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["latency_s"] = round(time.monotonic() - started, 3)
+    return record
+
+
+def transcribe_path(transcription_agent, path, on_event=None, deadline=None):
+    return transcription_agent.transcribe_file(path, on_event=on_event, deadline=deadline)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    # Stateless: nothing outlives a request except the shared caches, so any
+    # replica behind the load balancer can take any call
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            return self._send_json(200, {"status": "ok", "jobs": get_job_queue().stats()})
+        if path == "/metrics":
+            return self._send(200, metrics.render_prometheus().encode('utf-8'), "text/plain; version=0.0.4")
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        path = urlparse(self.path).path
+        endpoint = {
+            "/v1/transcriptions": self._transcription,
+            "/v1/analyses": self._analysis,
+            "/v1/batch": self._batch,
+        }.get(path)
+        try:
+            if endpoint is None:
+                raise ApiError(404, "Not found")
+            with tempfile.TemporaryDirectory(prefix="meetingmind-api-") as directory:
+                status = endpoint(directory)
+        except ApiError as e:
+            # The body may be half read; do not reuse the connection
+            self.close_connection = True
+            status = e.status
+            self._send_json(status, {"error": str(e)})
+        except Exception:
+            logger.exception("API request %s failed", path)
+            self.close_connection = True
+            status = 500
+            self._send_json(status, {"error": "Internal error"})
+        label = path if endpoint is not None else "other"
+        metrics.inc("meetingmind_api_requests_total", endpoint=label, status=str(status))
+        metrics.observe("meetingmind_api_request_seconds", time.perf_counter() - started, endpoint=label)
+
+    def _transcription(self, directory):
+        form = self._read_form(directory)
+        upload = next((upload for upload in form.files if upload["name"] in ("file", "audio")), None)
+        if upload is None:
+            raise ApiError(400, "Expected a 'file' part with the recording")
+        transcription_agent, _ = self.server.agents[INTERACTIVE]
+        job = self._run("transcription", transcribe_path, transcription_agent, upload["path"])
+        if job.status != DONE or job.result == "Transcription failed":
+            raise ApiError(502, job.error or "Transcription failed")
+        return self._send_json(200, {"transcript": job.result})
+
+    def _analysis(self, directory):
+        if self._is_multipart():
+            form = self._read_form(directory)
+            meeting = self._meeting(form.fields)
+            for upload in form.files:
+                if upload["name"] in ("transcript", "notes"):
+                    meeting[upload["name"]] = form.text(upload)
+                else:
+                    meeting["audio_path"] = upload["path"]
+        else:
+            meeting = self._meeting(self._read_json())
+        if not any((meeting.get(key) or "").strip() for key in ("transcript", "notes", "audio_path")):
+            raise ApiError(400, "Expected a transcript, notes or a recording")
+        job = self._run("analysis", process_meeting, *self.server.agents[INTERACTIVE], meeting)
+        if job.status != DONE:
+            raise ApiError(502, job.error or "Analysis failed")
+        return self._send_json(200, job.result)
+
+    def _batch(self, directory):
+        items = self._read_batch(directory)
+        if not items:
+            raise ApiError(400, "Expected at least one item")
+        if len(items) > MAX_BATCH_ITEMS:
+            raise ApiError(413, f"At most {MAX_BATCH_ITEMS} items per batch")
+
+        # Batch items queue behind interactive calls in the shared rate limiter
+        queue = get_job_queue()
+        job_ids = [queue.submit("batch", process_item, *self.server.agents[BATCH], item) for item in items]
+        futures = {queue.get(job_id).future: index for index, job_id in enumerate(job_ids)}
+
+        if not self._wants_ndjson():
+            records = [None] * len(items)
+            for future in as_completed(futures):
+                index = futures[future]
+                records[index] = self._record(job_ids[index], items[index])
+            failures = sum(1 for record in records if record["status"] != "ok")
+            return self._send_json(200, {"items": records, "failures": failures})
+
+        # One line per item as soon as it finishes, in completion order
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pending = set(range(len(items)))
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                pending.discard(index)
+                record = self._record(job_ids[index], items[index])
+                self._write_chunk(json.dumps(record).encode('utf-8') + b"\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; stop the work nobody will read
+            for index in pending:
+                queue.cancel(job_ids[index])
+                queue.discard(job_ids[index])
+            self.close_connection = True
+        return 200
+
+    def _run(self, kind, fn, *args):
+        queue = get_job_queue()
+        job_id = queue.submit(kind, fn, *args)
+        queue.get(job_id).future.result()
+        job = queue.get(job_id)
+        queue.discard(job_id)
+        return job
+
+    def _record(self, job_id, item):
+        queue = get_job_queue()
+        job = queue.get(job_id)
+        queue.discard(job_id)
+        if job is not None and job.status == DONE:
+            return job.result
+        return {"id": item["id"], "status": "error", "error": job.error if job is not None else "Job expired"}
+
+    def _read_batch(self, directory):
+        if not self._is_multipart():
+            body = self._read_json()
+            items = body.get("items") if isinstance(body, dict) else body
+            if not isinstance(items, list):
+                raise ApiError(400, "Expected {\"items\": [...]}")
+            return [dict(self._meeting(item), id=str(item.get("id", index))) for index, item in enumerate(items)]
+
+        # Multipart: every file is one meeting, recordings are transcribed first
+        form = self._read_form(directory)
+        defaults = self._meeting(form.fields)
+        items = []
+        for upload in form.files:
+            item = dict(defaults, id=upload["filename"])
+            if os.path.splitext(upload["filename"])[1].lower() in AUDIO_EXTENSIONS:
+                item["audio_path"] = upload["path"]
+            else:
+                item["transcript"] = form.text(upload)
+            items.append(item)
+        return items
+
+    def _meeting(self, fields):
+        if not isinstance(fields, dict):
+            raise ApiError(400, "Expected a JSON object")
+        meeting_type = fields.get("meeting_type") or "general"
+        if meeting_type not in MEETING_TYPES:
+            raise ApiError(400, f"meeting_type must be one of {', '.join(MEETING_TYPES)}")
+        meeting = {"meeting_type": meeting_type}
+        for key in ("transcript", "notes"):
+            value = fields.get(key)
+            if value is not None and not isinstance(value, str):
+                raise ApiError(400, f"'{key}' must be a string")
+            meeting[key] = value
+        return meeting
+
+    def _content_length(self, limit):
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            raise ApiError(411, "Chunked uploads are not supported; send Content-Length")
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            raise ApiError(411, "Content-Length required") from None
+        if length > limit:
+            raise ApiError(413, f"Request body is larger than {limit} bytes")
+        return length
+
+    def _is_multipart(self):
+        return parse_options_header(self.headers.get("Content-Type", ""))[0] == b"multipart/form-data"
+
+    def _read_json(self):
+        body = self.rfile.read(self._content_length(MAX_FIELD_BYTES))
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            raise ApiError(400, "Request body is not valid JSON") from None
+
+    def _read_form(self, directory):
+        content_type, params = parse_options_header(self.headers.get("Content-Type", ""))
+        if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+            raise ApiError(415, "Expected multipart/form-data")
+        remaining = self._content_length(MAX_UPLOAD_BYTES)
+        form = UploadForm(directory)
+        parser = form.parser(params[b"boundary"])
+        try:
+            # Block by block from the socket to disk; a 500 MB recording
+            # costs READ_BLOCK of memory, not 500 MB
+            while remaining > 0:
+                block = self.rfile.read(min(remaining, READ_BLOCK))
+                if not block:
+                    raise ApiError(400, "Upload ended before Content-Length bytes arrived")
+                remaining -= len(block)
+                parser.write(block)
+            parser.finalize()
+        finally:
+            form.close()
+        return form
+
+    def _wants_ndjson(self):
+        query = parse_qs(urlparse(self.path).query)
+        return "application/x-ndjson" in self.headers.get("Accept", "") or query.get("format") == ["ndjson"]
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, body):
+        return self._send(status, json.dumps(body).encode('utf-8'), "application/json")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return status
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ApiServer:
+    def __init__(self, host="127.0.0.1", port=0, base_url=None):
+        self.httpd = ThreadingHTTPServer((host, port), ApiHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.agents = {
+            INTERACTIVE: (TranscriptionAgent(base_url=base_url), AnalysisAgent(base_url=base_url)),
+            BATCH: (TranscriptionAgent(base_url=base_url, priority=BATCH),
+                    AnalysisAgent(base_url=base_url, priority=BATCH)),
+        }
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="meetingmind-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API for transcription and meeting analysis")
+    parser.add_argument("--host", default=os.getenv('MEETINGMIND_API_HOST', '127.0.0.1'))
+    parser.add_argument("--port", type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument("--mock", action="store_true", help="answer from an in-process mock of the OpenAI API")
+    parser.add_argument("--mock-latency", type=float, default=0.2, help="mock response latency in seconds")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    mock = None
+    base_url = None
+    if args.mock:
+        from mock_server import MockOpenAIServer
+        mock = MockOpenAIServer(latency=args.mock_latency).start()
+        base_url = mock.base_url
+    server = ApiServer(args.host, args.port, base_url)
+    print(f"MeetingMind API listening on {server.url}" + (f" (mock upstream {base_url})" if mock else ""),
+          file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        if mock is not None:
+            mock.stop()
+    return 0
+
+
+metrics.describe("meetingmind_api_requests_total", "HTTP API requests by endpoint and status")
+metrics.describe("meetingmind_api_request_seconds", "HTTP API request latency by endpoint")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,35 @@
 import streamlit as st
 import tempfile
 import os
+import shutil
+import time
+import copy
 from datetime import datetime
 import json
-import time
+import logging
 
+import metrics
 from fixed_agents import TranscriptionAgent, AnalysisAgent
+from cache import get_analysis_cache, get_transcript_cache
+from events import emit
+from extraction import is_fallback
+from fusion import fuse_sources
+from jobs import CANCELLED, DONE, FAILED, get_job_queue
+from schema import FIELDS, validate_field
+from store import get_meeting_store, save_meeting
+
+POLL_INTERVAL = float(os.getenv('MEETINGMIND_POLL_INTERVAL', '0.5'))
+HISTORY_PERIODS = {"Any time": None, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}
+
+# One JSON line per request on stderr, picked up by the platform log drain
+request_logger = logging.getLogger("meetingmind")
+if not request_logger.handlers:
+    request_logger.addHandler(logging.StreamHandler())
+    request_logger.setLevel(logging.INFO)
+    request_logger.propagate = False
+
+if os.getenv('MEETINGMIND_METRICS_PORT'):
+    metrics.start_http_server(int(os.getenv('MEETINGMIND_METRICS_PORT')))
 
 st.set_page_config(
     page_title="MeetingMind AI",
@@ -208,6 +232,72 @@ def create_progress_bar(percentage):
     </div>
     """
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def fuse_meeting_sources(sources):
+    return fuse_sources(list(sources))
+
+def transcribe_upload(agent, path, on_event=None, deadline=None):
+    try:
+        return agent.transcribe_file(path, on_event=on_event, deadline=deadline)
+    finally:
+        os.unlink(path)
+
+def analyze_content(agent, content, meeting_type, sources_used, on_event=None, deadline=None):
+    # Runs on a job worker; partial fields are published on the job for the UI to poll
+    analysis = None
+    partial = {"action_items": []}
+    for kind, name, value in agent.analyze_meeting_stream(content, meeting_type, sources_used, on_event=on_event,
+                                                          deadline=deadline):
+        if kind == "result":
+            analysis = value
+            continue
+        if kind == "item":
+            # Streamed elements are raw model JSON; clean them as the final result is
+            cleaned = validate_field(name, [value]) if name in FIELDS else None
+            if not cleaned:
+                continue
+            partial.setdefault(name, []).extend(cleaned)
+        elif not isinstance(value, list):
+            partial[name] = value
+        else:
+            continue
+        emit(on_event, "partial", "Receiving results", partial=copy.deepcopy(partial))
+    if not is_fallback(analysis):
+        save_meeting(analysis, content, meeting_type, sources_used)
+    return {"analysis": analysis, "sources_used": sources_used}
+
+def collect_jobs():
+    # Moves finished job results into this session; returns jobs still running
+    queue = get_job_queue()
+    active = {}
+    for name in ("transcription_job", "analysis_job"):
+        job_id = st.session_state.get(name)
+        if not job_id:
+            continue
+        job = queue.get(job_id)
+        if job is None:
+            del st.session_state[name]
+            st.session_state.job_notice = "A background job expired before its result was collected"
+            continue
+        if job.status == DONE:
+            if job.kind == "transcription":
+                st.session_state.audio_transcript = job.result
+            else:
+                st.session_state.last_analysis = job.result["analysis"]
+                st.session_state.sources_used = job.result["sources_used"]
+            queue.discard(job_id)
+            del st.session_state[name]
+        elif job.status == FAILED:
+            st.session_state.job_notice = f"{job.kind.capitalize()} failed: {job.error}"
+            queue.discard(job_id)
+            del st.session_state[name]
+        elif job.status == CANCELLED:
+            queue.discard(job_id)
+            del st.session_state[name]
+        else:
+            active[job.kind] = job
+    return active
+
 def main():
     st.markdown('<h1 style="font-size: 3rem; color: #ffffff; text-align: center; margin-bottom: 0.5rem;">MeetingMind AI</h1>', unsafe_allow_html=True)
     st.markdown('<p style="color: #94a3b8; text-align: center; margin-bottom: 2rem;">Transform meetings into actionable insights</p>', unsafe_allow_html=True)
@@ -222,6 +312,10 @@ def main():
         st.error(f"System failed: {e}")
         st.stop()
     
+    active_jobs = collect_jobs()
+    if st.session_state.get('job_notice'):
+        st.error(st.session_state.pop('job_notice'))
+    
     with st.sidebar:
         st.markdown("# Control Panel")
         
@@ -239,13 +333,25 @@ def main():
         st.markdown("## System Status")
         st.success("Connected")
         st.success("Ready")
+        
+        cache_stats = get_analysis_cache().stats()
+        st.caption(f"Analysis cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        transcript_stats = get_transcript_cache().stats()
+        st.caption(f"Transcript cache: {transcript_stats['hits']} hits / {transcript_stats['misses']} misses")
+        prompt_stats = st.session_state.analysis_agent.prompt_builder.stats()
+        st.caption(f"Prompt compaction saved {prompt_stats['saved_tokens']} tokens ({prompt_stats['saved_ratio']:.0%})")
+        flight_stats = st.session_state.analysis_agent.flight.stats()
+        st.caption(f"Coalesced analyses: {flight_stats['coalesced']} ({flight_stats['coalesce_rate']:.0%})")
+        limiter_stats = st.session_state.analysis_agent.limiter.stats()
+        st.caption(f"Rate limiter: {limiter_stats['waiting']} waiting · {limiter_stats['throttled']} throttles")
+        job_stats = get_job_queue().stats()
+        st.caption(f"Background jobs: {job_stats['running']} running / {job_stats['queued']} queued")
     
     col1, col2 = st.columns([3, 1])
     
     with col1:
         transcript = None
         user_notes = None
-        audio_transcript = None
         
         if use_audio:
             st.markdown('<div class="section-header">Audio Processing</div>', unsafe_allow_html=True)
@@ -259,38 +365,29 @@ def main():
                 st.write(f"**File:** {uploaded_file.name}")
                 st.write(f"**Size:** {uploaded_file.size / (1024*1024):.1f}MB")
                 
-                if st.button("Process Recording", type="primary"):
-                    progress_placeholder = st.empty()
-                    status_placeholder = st.empty()
-                    
-                    steps = [
-                        ("Validating file format", 25),
-                        ("Transcribing audio content", 75),
-                        ("Finalizing transcript", 100)
-                    ]
-                    
-                    for step_text, progress in steps:
-                        status_placeholder.markdown(create_status_indicator("processing", step_text), unsafe_allow_html=True)
-                        progress_placeholder.markdown(create_progress_bar(progress), unsafe_allow_html=True)
-                        time.sleep(0.8)
-                    
+                if st.button("Process Recording", type="primary", disabled="transcription" in active_jobs):
                     try:
                         with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
+                            uploaded_file.seek(0)
+                            shutil.copyfileobj(uploaded_file, tmp_file)
                             tmp_file_path = tmp_file.name
                         
-                        with open(tmp_file_path, 'rb') as audio_file:
-                            audio_transcript = st.session_state.transcription_agent.transcribe_audio(audio_file)
-                        
-                        os.unlink(tmp_file_path)
-                        
-                        progress_placeholder.empty()
-                        status_placeholder.markdown(create_status_indicator("success", "Processing completed successfully"), unsafe_allow_html=True)
-                        st.session_state.audio_transcript = audio_transcript
-                        
+                        # The job owns the temp file from here and deletes it when done
+                        st.session_state.transcription_job = get_job_queue().submit(
+                            "transcription", transcribe_upload, st.session_state.transcription_agent, tmp_file_path
+                        )
                     except Exception as e:
-                        progress_placeholder.empty()
-                        status_placeholder.error(f"Processing failed: {str(e)}")
+                        st.error(f"Processing failed: {str(e)}")
+                    else:
+                        st.rerun()
+            
+            if "transcription" in active_jobs:
+                job = active_jobs["transcription"]
+                st.markdown(create_status_indicator("processing", job.message), unsafe_allow_html=True)
+                st.markdown(create_progress_bar(int(job.progress * 100)), unsafe_allow_html=True)
+                if st.button("Cancel", key="cancel_transcription"):
+                    get_job_queue().cancel(job.id)
+                    st.rerun()
             
             if 'audio_transcript' in st.session_state:
                 with st.expander("View Audio Transcription"):
@@ -324,23 +421,47 @@ def main():
             st.metric("Confidence", analysis.get('confidence_score', 'High'))
         else:
             st.info("Analytics will appear here after processing meeting data")
+        
+        p50 = metrics.quantile("meetingmind_request_seconds", 0.5, kind="analysis")
+        if p50 is not None:
+            p95 = metrics.quantile("meetingmind_request_seconds", 0.95, kind="analysis")
+            st.metric("Analysis Latency p50", f"{p50:.2f}s")
+            st.metric("Analysis Latency p95", f"{p95:.2f}s")
+            st.metric("Tokens Used", int(metrics.counter_value("meetingmind_tokens_total")))
+            lookups = metrics.counter_value("meetingmind_cache_lookups_total", cache="analysis")
+            hits = metrics.counter_value("meetingmind_cache_lookups_total", cache="analysis", result="hit")
+            requests_total = metrics.counter_value("meetingmind_requests_total", kind="analysis")
+            fallbacks = metrics.counter_value("meetingmind_fallbacks_total")
+            st.caption(f"Cache hit rate {hits / lookups:.0%} · fallback rate {fallbacks / requests_total:.0%}")
+            replies = metrics.counter_value("meetingmind_parse_total")
+            if replies:
+                repaired = metrics.counter_value("meetingmind_parse_total", outcome="repaired")
+                failed = metrics.counter_value("meetingmind_parse_total", outcome="failed")
+                st.caption(f"Replies repaired {repaired / replies:.0%} · unparseable {failed / replies:.0%}")
+            with st.expander("Prometheus metrics"):
+                st.code(metrics.render_prometheus(), language="text")
     
     # Analysis engine
-    combined_content = ""
+    sources = []
     sources_used = []
     
-    if 'audio_transcript' in st.session_state and st.session_state.audio_transcript:
-        combined_content += f"AUDIO TRANSCRIPTION:\n{st.session_state.audio_transcript}\n\n"
-        sources_used.append("Audio Recording")
-    
+    # A typed transcript is usually cleaner than Whisper output, so it goes
+    # first and wins when fusion finds the same passage in both
     if transcript and transcript.strip():
-        combined_content += f"MEETING TRANSCRIPT:\n{transcript}\n\n"
+        sources.append(("MEETING TRANSCRIPT", transcript))
         sources_used.append("Text Transcript")
     
+    if 'audio_transcript' in st.session_state and st.session_state.audio_transcript:
+        sources.append(("AUDIO TRANSCRIPTION", st.session_state.audio_transcript))
+        sources_used.append("Audio Recording")
+    
     if user_notes and user_notes.strip():
-        combined_content += f"ADDITIONAL CONTEXT:\n{user_notes}\n\n"
+        sources.append(("ADDITIONAL CONTEXT", user_notes))
         sources_used.append("Context Notes")
     
+    fusion = fuse_meeting_sources(tuple(sources))
+    combined_content = fusion["content"]
+    
     if combined_content.strip():
         st.markdown('<div class="section-header">Analysis Engine</div>', unsafe_allow_html=True)
         
@@ -349,53 +470,125 @@ def main():
             st.write(f"**Active Sources:** {len(sources_used)}")
             for i, source in enumerate(sources_used, 1):
                 st.write(f"**{i}.** {source}")
+            if fusion["removed_passages"]:
+                st.caption(f"Fusion removed {fusion['removed_passages']} duplicate passages (~{fusion['removed_tokens']} tokens)")
         
         with col_preview:
             with st.expander("Preview Combined Input"):
                 preview = combined_content[:400] + "..." if len(combined_content) > 400 else combined_content
                 st.text_area("Content Preview", preview, height=120, disabled=True)
         
-        if st.button("Analyze Meeting", type="primary", use_container_width=True):
-            analysis_placeholder = st.empty()
-            progress_placeholder = st.empty()
-            
-            steps = [
-                ("Processing input data", 20),
-                ("Loading AI models", 40),
-                ("Analyzing content", 60),
-                ("Extracting insights", 80),
-                ("Finalizing results", 100)
-            ]
-            
-            for step_text, progress in steps:
-                analysis_placeholder.markdown(create_status_indicator("processing", step_text), unsafe_allow_html=True)
-                progress_placeholder.markdown(create_progress_bar(progress), unsafe_allow_html=True)
-                time.sleep(1.0)
-            
-            try:
-                analysis = st.session_state.analysis_agent.analyze_meeting_multi_source(
-                    combined_content, meeting_type, sources_used
-                )
-                
-                st.session_state.last_analysis = analysis
-                st.session_state.sources_used = sources_used
-                
-                progress_placeholder.empty()
-                analysis_placeholder.markdown(create_status_indicator("success", "Analysis completed successfully"), unsafe_allow_html=True)
-                
-                display_results(analysis, sources_used)
-                
-            except Exception as e:
-                progress_placeholder.empty()
-                analysis_placeholder.error(f"Analysis failed: {str(e)}")
+        if st.button("Analyze Meeting", type="primary", use_container_width=True, disabled="analysis" in active_jobs):
+            st.session_state.analysis_job = get_job_queue().submit(
+                "analysis", analyze_content, st.session_state.analysis_agent,
+                combined_content, meeting_type, sources_used
+            )
+            st.rerun()
     
     elif use_audio or use_text or use_notes:
         st.info("Add meeting content to your selected input sources above, then click analyze")
+    
+    if "analysis" in active_jobs:
+        job = active_jobs["analysis"]
+        st.markdown(create_status_indicator("processing", job.message), unsafe_allow_html=True)
+        st.markdown(create_progress_bar(int(job.progress * 100)), unsafe_allow_html=True)
+        if st.button("Cancel", key="cancel_analysis"):
+            get_job_queue().cancel(job.id)
+            st.rerun()
+        if job.partial:
+            display_partial_results(st.empty(), job.partial)
+    elif st.session_state.get('last_analysis'):
+        with metrics.timer("render", kind="analysis"):
+            display_results(st.session_state.last_analysis, st.session_state.get('sources_used', []))
+    
+    display_history()
+    
+    # Poll by rerunning while work is in flight; widget values survive reruns
+    if active_jobs:
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+
+def display_history():
+    st.markdown('<div class="section-header">Meeting History</div>', unsafe_allow_html=True)
+    store = get_meeting_store()
+    stats = store.stats()
+    if not stats['meetings']:
+        st.info("Analyzed meetings are saved here and become searchable")
+        return
+    
+    st.caption(f"{stats['meetings']} meetings · {stats['action_items']} action items")
+    col_query, col_assignee, col_priority, col_since = st.columns([3, 2, 1, 2])
+    with col_query:
+        query = st.text_input("Search past meetings", placeholder="migration, billing page, security review...")
+    with col_assignee:
+        assignee = st.selectbox("Assignee", ["Anyone"] + store.assignees())
+    with col_priority:
+        priority = st.selectbox("Priority", ["Any", "High", "Medium", "Low"])
+    with col_since:
+        period = st.selectbox("Period", list(HISTORY_PERIODS))
+    since = time.time() - HISTORY_PERIODS[period] * 86400 if HISTORY_PERIODS[period] else None
+    
+    if assignee != "Anyone" or priority != "Any":
+        items = store.action_items(
+            assignee=None if assignee == "Anyone" else assignee,
+            priority=None if priority == "Any" else priority,
+            since=since
+        )
+        st.markdown(f"### Action Items ({len(items)})")
+        for item in items:
+            when = datetime.fromtimestamp(item['created']).strftime('%Y-%m-%d')
+            st.markdown(f"**{item['task']}** — {item['assignee']} · due {item['due_date']} · {item['priority']} · _{when} {item['meeting_type']}_")
+    
+    for meeting in store.search(query, since=since, limit=10):
+        when = datetime.fromtimestamp(meeting['created']).strftime('%Y-%m-%d %H:%M')
+        with st.expander(f"{when} · {meeting['meeting_type']} · {meeting['summary'][:80]}"):
+            if meeting['snippet']:
+                st.caption(meeting['snippet'])
+            saved = store.get(meeting['id'])
+            st.write(saved['analysis'].get('meeting_summary', ''))
+            for i, item in enumerate(saved['analysis'].get('action_items', []), 1):
+                st.markdown(create_action_item(i, item), unsafe_allow_html=True)
+
+def create_action_item(i, item):
+    priority = item.get('priority', 'Medium')
+    priority_class = f"priority-{priority.lower()}"
+    
+    return f'''
+    <div class="action-item {priority_class}">
+        <h4 style="color: #3b82f6; margin-bottom: 1rem;">Task {i}: {item.get('task', '')}</h4>
+        <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 1rem;">
+            <div><strong>Assignee:</strong><br>{item.get('assignee', 'Not specified')}</div>
+            <div><strong>Due Date:</strong><br>{item.get('due_date', 'Not specified')}</div>
+            <div><strong>Priority:</strong><br>{priority}</div>
+        </div>
+    </div>
+    '''
+
+def display_partial_results(placeholder, partial):
+    # Fills in fields as the model streams them; replaced by display_results at the end
+    with placeholder.container():
+        st.markdown('<div class="section-header">Live Results</div>', unsafe_allow_html=True)
+        
+        if partial.get('meeting_summary'):
+            st.markdown("### Meeting Summary")
+            st.write(partial['meeting_summary'])
+        
+        if partial['action_items']:
+            st.markdown("### Action Items")
+            for i, item in enumerate(partial['action_items'], 1):
+                st.markdown(create_action_item(i, item), unsafe_allow_html=True)
+        
+        if partial.get('key_decisions'):
+            st.markdown("### Key Decisions")
+            for i, decision in enumerate(partial['key_decisions'], 1):
+                st.markdown(f"**{i}.** {decision}")
 
 def display_results(analysis, sources_used):
     st.markdown('<div class="section-header">Analysis Results</div>', unsafe_allow_html=True)
     
-    if sources_used:
+    if is_fallback(analysis):
+        st.warning("AI analysis was unavailable, so these results were extracted locally from the text. Run the analysis again for a full summary.")
+    elif sources_used:
         st.success(f"Successfully processed {len(sources_used)} data sources")
     
     tab1, tab2, tab3, tab4 = st.tabs(["Executive Summary", "Action Items", "Decisions & Next Steps", "Export Options"])
@@ -419,18 +612,7 @@ def display_results(analysis, sources_used):
         
         if analysis['action_items']:
             for i, item in enumerate(analysis['action_items'], 1):
-                priority_class = f"priority-{item['priority'].lower()}"
-                
-                st.markdown(f'''
-                <div class="action-item {priority_class}">
-                    <h4 style="color: #3b82f6; margin-bottom: 1rem;">Task {i}: {item['task']}</h4>
-                    <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 1rem;">
-                        <div><strong>Assignee:</strong><br>{item['assignee']}</div>
-                        <div><strong>Due Date:</strong><br>{item['due_date']}</div>
-                        <div><strong>Priority:</strong><br>{item['priority']}</div>
-                    </div>
-                </div>
-                ''', unsafe_allow_html=True)
+                st.markdown(create_action_item(i, item), unsafe_allow_html=True)
         else:
             st.info("No action items identified in the meeting content")
     
@@ -0,0 +1,273 @@
+import os
+import re
+import wave
+from collections import deque
+from difflib import SequenceMatcher
+
+import numpy as np
+
+SEGMENT_SECONDS = float(os.getenv('MEETINGMIND_SEGMENT_SECONDS', '300'))
+SEGMENT_OVERLAP_SECONDS = float(os.getenv('MEETINGMIND_SEGMENT_OVERLAP_SECONDS', '5'))
+# Whisper rejects uploads above 25 MB; stay safely under it per segment
+MAX_SEGMENT_BYTES = int(os.getenv('MEETINGMIND_MAX_SEGMENT_BYTES', str(24 * 1024 * 1024)))
+
+PREPROCESS_AUDIO = os.getenv('MEETINGMIND_PREPROCESS_AUDIO', '1') != '0'
+TARGET_RATE = int(os.getenv('MEETINGMIND_TARGET_SAMPLE_RATE', '16000'))
+VAD_THRESHOLD_DB = float(os.getenv('MEETINGMIND_VAD_THRESHOLD_DB', '-45'))
+# Pauses shorter than this are speech rhythm and stay in
+VAD_MIN_SILENCE_SECONDS = float(os.getenv('MEETINGMIND_VAD_MIN_SILENCE_SECONDS', '1.0'))
+VAD_PADDING_SECONDS = float(os.getenv('MEETINGMIND_VAD_PADDING_SECONDS', '0.3'))
+VAD_FRAME_SECONDS = 0.03
+
+COPY_FRAMES = 64 * 1024
+STITCH_WINDOW_WORDS = 60
+MIN_OVERLAP_WORDS = 3
+
+
+def is_wav(path):
+    try:
+        with wave.open(path, 'rb'):
+            return True
+    except (wave.Error, EOFError, OSError):
+        return False
+
+
+def wav_duration(path):
+    with wave.open(path, 'rb') as source:
+        return source.getnframes() / float(source.getframerate())
+
+
+def segment_plan(path, window_seconds=SEGMENT_SECONDS, overlap_seconds=SEGMENT_OVERLAP_SECONDS):
+    with wave.open(path, 'rb') as source:
+        rate = source.getframerate()
+        frame_bytes = source.getsampwidth() * source.getnchannels()
+        total = source.getnframes()
+
+    window = min(int(window_seconds * rate), MAX_SEGMENT_BYTES // frame_bytes)
+    overlap = min(int(overlap_seconds * rate), window // 4)
+    plan = []
+    start = 0
+    while start < total:
+        end = min(total, start + window)
+        plan.append((start, end))
+        if end == total:
+            break
+        start = end - overlap
+    return rate, plan
+
+
+def write_wav_segments(path, out_dir, window_seconds=SEGMENT_SECONDS, overlap_seconds=SEGMENT_OVERLAP_SECONDS):
+    # Copies each window frame-block by frame-block, so memory stays at
+    # COPY_FRAMES regardless of recording length
+    rate, plan = segment_plan(path, window_seconds, overlap_seconds)
+    with wave.open(path, 'rb') as source:
+        frame_bytes = source.getsampwidth() * source.getnchannels()
+        for index, (start, end) in enumerate(plan):
+            segment_path = os.path.join(out_dir, f"segment_{index:04d}.wav")
+            source.setpos(start)
+            with wave.open(segment_path, 'wb') as target:
+                target.setnchannels(source.getnchannels())
+                target.setsampwidth(source.getsampwidth())
+                target.setframerate(rate)
+                remaining = end - start
+                while remaining > 0:
+                    frames = source.readframes(min(COPY_FRAMES, remaining))
+                    if not frames:
+                        break
+                    target.writeframes(frames)
+                    remaining -= len(frames) // frame_bytes
+            yield index, start / float(rate), segment_path
+
+
+def _normalized(words):
+    return [re.sub(r"[^\w']+", "", word.lower()) for word in words]
+
+
+def stitch_transcripts(texts):
+    stitched = []
+    for text in texts:
+        words = text.split()
+        if not stitched:
+            stitched = words
+            continue
+
+        # Overlapping windows repeat a few seconds of speech; find the longest
+        # shared run between the tail we have and the head of the next piece
+        tail = stitched[-STITCH_WINDOW_WORDS:]
+        head = words[:STITCH_WINDOW_WORDS]
+        matcher = SequenceMatcher(None, _normalized(tail), _normalized(head), autojunk=False)
+        match = matcher.find_longest_match(0, len(tail), 0, len(head))
+        if match.size >= MIN_OVERLAP_WORDS:
+            stitched = stitched[:len(stitched) - len(tail) + match.a] + words[match.b:]
+        else:
+            stitched = stitched + words
+    return " ".join(stitched)
+
+
+def _to_float(frames, sample_width, channels):
+    # Interleaved PCM of any common width to mono float32 in [-1, 1]
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        packed = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = (np.where(packed & 0x800000, packed - 0x1000000, packed)).astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+class _Resampler:
+    # Streaming box-filter + linear interpolation. The box filter is a cheap
+    # anti-alias for downsampling; both keep a few samples of state between
+    # blocks so block boundaries leave no seams.
+    def __init__(self, source_rate, target_rate):
+        self.step = source_rate / float(target_rate)
+        self.width = max(1, int(self.step))
+        self._history = np.zeros(self.width - 1, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._position = 0.0
+
+    def feed(self, samples):
+        if self.step == 1.0:
+            return samples
+        if self.width > 1:
+            buffered = np.concatenate((self._history, samples))
+            self._history = buffered[len(buffered) - (self.width - 1):]
+            samples = np.convolve(buffered, np.full(self.width, 1.0 / self.width, dtype=np.float32), mode='valid')
+        buffered = np.concatenate((self._pending, samples.astype(np.float32)))
+        if len(buffered) < 2:
+            self._pending = buffered
+            return np.zeros(0, dtype=np.float32)
+        positions = np.arange(self._position, len(buffered) - 1, self.step)
+        resampled = np.interp(positions, np.arange(len(buffered)), buffered).astype(np.float32)
+        next_position = (positions[-1] + self.step) if len(positions) else self._position
+        keep = int(next_position)
+        self._pending = buffered[keep:]
+        self._position = next_position - keep
+        return resampled
+
+
+class _VoiceFilter:
+    # Energy VAD over fixed frames. Silent runs longer than the minimum are
+    # cut down to padding on each side; each kept span starts a new entry in
+    # the time map, (output seconds, source seconds), so offsets in the
+    # trimmed audio can be mapped back to the original recording.
+    def __init__(self, rate, threshold_db, min_silence_seconds, padding_seconds):
+        self.rate = rate
+        self.frame = max(1, int(rate * VAD_FRAME_SECONDS))
+        self.threshold = 10 ** (threshold_db / 20.0)
+        self.padding = max(0, int(padding_seconds / VAD_FRAME_SECONDS))
+        self.min_silence = max(2 * self.padding + 1, int(min_silence_seconds / VAD_FRAME_SECONDS))
+        self.time_map = [(0.0, 0.0)]
+        self.voiced = False
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._silence = []
+        self._silence_frames = 0
+        self._tail = deque(maxlen=self.padding)
+        self._source_frames = 0
+        self.output_samples = 0
+
+    def feed(self, samples, final=False):
+        buffered = np.concatenate((self._carry, samples))
+        count = len(buffered) // self.frame
+        if final and len(buffered) % self.frame:
+            count += 1
+        frames = [buffered[i * self.frame:(i + 1) * self.frame] for i in range(count)]
+        self._carry = buffered[count * self.frame:]
+        if not frames:
+            return []
+        energy = np.array([np.sqrt(np.mean(np.square(frame))) if len(frame) else 0.0 for frame in frames])
+        kept = []
+        for frame, loud in zip(frames, energy >= self.threshold):
+            if loud:
+                self.voiced = True
+                if self._silence_frames > self.min_silence:
+                    # Long pause ended: resume with its last few frames, and
+                    # note where the kept audio rejoins the original
+                    resume = self._source_frames - len(self._tail)
+                    self.time_map.append((self.output_samples / float(self.rate),
+                                          resume * self.frame / float(self.rate)))
+                    self._emit(kept, list(self._tail))
+                else:
+                    self._emit(kept, self._silence)
+                self._silence = []
+                self._silence_frames = 0
+                self._tail.clear()
+                self._emit(kept, [frame])
+            else:
+                self._silence_frames += 1
+                if self._silence_frames <= self.padding:
+                    # Leading edge of every pause is kept right away
+                    self._emit(kept, [frame])
+                elif self._silence_frames <= self.min_silence:
+                    self._silence.append(frame)
+                    self._tail.append(frame)
+                else:
+                    self._silence = []
+                    self._tail.append(frame)
+            self._source_frames += 1
+        if final and self._silence_frames <= self.min_silence:
+            self._emit(kept, self._silence)
+        return kept
+
+    def _emit(self, kept, frames):
+        for frame in frames:
+            kept.append(frame)
+            self.output_samples += len(frame)
+
+
+def source_offset(time_map, seconds):
+    # Position in the original recording for a position in the trimmed one
+    anchor = time_map[0]
+    for entry in time_map:
+        if entry[0] > seconds:
+            break
+        anchor = entry
+    return anchor[1] + (seconds - anchor[0])
+
+
+def preprocess_wav(path, out_path, target_rate=TARGET_RATE, threshold_db=VAD_THRESHOLD_DB,
+                   min_silence_seconds=VAD_MIN_SILENCE_SECONDS, padding_seconds=VAD_PADDING_SECONDS, deadline=None):
+    # Mono, target_rate, 16-bit, with long silences removed. Read and written
+    # COPY_FRAMES at a time, so memory does not grow with the recording.
+    with wave.open(path, 'rb') as source, wave.open(out_path, 'wb') as target:
+        channels = source.getnchannels()
+        sample_width = source.getsampwidth()
+        rate = source.getframerate()
+        total = source.getnframes()
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(target_rate)
+        resampler = _Resampler(rate, target_rate)
+        voice = _VoiceFilter(target_rate, threshold_db, min_silence_seconds, padding_seconds)
+        while True:
+            if deadline is not None:
+                deadline.check()
+            frames = source.readframes(COPY_FRAMES)
+            final = not frames
+            samples = resampler.feed(_to_float(frames, sample_width, channels)) if frames else np.zeros(0, np.float32)
+            kept = voice.feed(samples, final=final)
+            if kept:
+                pcm = np.clip(np.concatenate(kept), -1.0, 1.0)
+                target.writeframes((pcm * 32767.0).astype('<i2').tobytes())
+            if final:
+                break
+
+    input_bytes = os.path.getsize(path)
+    output_bytes = os.path.getsize(out_path)
+    return {
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "saved_bytes": input_bytes - output_bytes,
+        "input_seconds": total / float(rate),
+        "output_seconds": voice.output_samples / float(target_rate),
+        "voiced": voice.voiced,
+        "time_map": voice.time_map,
+    }
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from extraction import is_fallback
+from fixed_agents import TranscriptionAgent, AnalysisAgent
+from ratelimit import BATCH
+from store import save_meeting
+
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.mp4', '.mov', '.avi', '.mpeg', '.flac'}
+TEXT_EXTENSIONS = {'.txt', '.md'}
+
+
+class IntervalLimiter:
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+
+def discover_items(source, meeting_type):
+    if os.path.isdir(source):
+        for root, _, names in os.walk(source):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS | TEXT_EXTENSIONS:
+                    yield {"id": os.path.relpath(path, source), "path": path, "meeting_type": meeting_type}
+        return
+
+    # Manifest: one path per line, or JSON objects with id/path/meeting_type
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source) as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            item = json.loads(line) if line.startswith('{') else {"path": line}
+            item["path"] = os.path.join(base, item["path"])
+            item.setdefault("id", item["path"])
+            item.setdefault("meeting_type", meeting_type)
+            yield item
+
+
+def load_finished(output_path):
+    finished = set()
+    if not os.path.exists(output_path):
+        return finished
+    with open(output_path) as output:
+        for line in output:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave a half-written last line behind
+                continue
+            if record.get("status") == "ok":
+                finished.add(record["id"])
+    return finished
+
+
+def process_item(item, transcription_agent, analysis_agent, limiter):
+    limiter.wait()
+    started = time.monotonic()
+    record = {"id": item["id"], "path": item["path"]}
+    try:
+        extension = os.path.splitext(item["path"])[1].lower()
+        if extension in AUDIO_EXTENSIONS:
+            content = transcription_agent.transcribe_file(item["path"])
+            if content == "Transcription failed":
+                raise RuntimeError(content)
+            record["transcript"] = content
+        else:
+            with open(item["path"], encoding='utf-8', errors='replace') as text_file:
+                content = text_file.read()
+
+        analysis = analysis_agent.analyze_meeting_multi_source(content, item["meeting_type"], [extension])
+        if is_fallback(analysis):
+            # Keep the locally extracted result so the item is not a total loss
+            record["analysis"] = analysis
+            raise RuntimeError("Analysis failed")
+        save_meeting(analysis, content, item["meeting_type"], [extension])
+        record.update(status="ok", analysis=analysis)
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["latency_s"] = round(time.monotonic() - started, 3)
+    return record
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_batch(source, output_path, workers=4, per_minute=0, meeting_type="general"):
+    finished = load_finished(output_path)
+    items = [item for item in discover_items(source, meeting_type) if item["id"] not in finished]
+    print(f"{len(items)} items to process ({len(finished)} already done)", file=sys.stderr)
+
+    # Batch calls yield to interactive sessions in the shared rate limiter
+    transcription_agent = TranscriptionAgent(priority=BATCH)
+    analysis_agent = AnalysisAgent(priority=BATCH)
+    limiter = IntervalLimiter(per_minute)
+    latencies = []
+    failures = 0
+    started = time.monotonic()
+
+    with open(output_path, 'a') as output, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_item, item, transcription_agent, analysis_agent, limiter) for item in items]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            # One flushed line per item is the checkpoint: reruns skip "ok" ids
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            latencies.append(record["latency_s"])
+            if record["status"] != "ok":
+                failures += 1
+            print(f"[{done}/{len(items)}] {record['id']}: {record['status']} in {record['latency_s']:.2f}s", file=sys.stderr)
+
+    elapsed = time.monotonic() - started
+    return {
+        "items": len(items),
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "items_per_min": round(len(items) / elapsed * 60, 2) if elapsed else 0.0,
+        "latency_p50_s": percentile(latencies, 0.50),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "latency_max_s": max(latencies) if latencies else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze meeting transcripts and recordings in batch")
+    parser.add_argument("source", help="directory to walk, or a manifest file (paths or JSON lines)")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL output; also used to resume")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="concurrent items")
+    parser.add_argument("-r", "--rate", type=float, default=0, help="max items started per minute (0 = unlimited)")
+    parser.add_argument("-t", "--meeting-type", default="general",
+                        choices=["general", "standup", "planning", "retrospective"])
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.source, args.output, args.workers, args.rate, args.meeting_type)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import io
+import json
+import platform
+import random
+import resource
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import transport
+from batch import percentile
+from cache import AnalysisCache, TranscriptCache
+from extraction import is_fallback
+from fixed_agents import AnalysisAgent, TranscriptionAgent
+from mock_server import WORDS, MockOpenAIServer
+
+DEFAULT_CONCURRENCY = (1, 4, 16, 64)
+
+SAMPLE_TURNS = [
+    "Alice: We agreed to ship the new billing page on Friday.",
+    "Bob: I will fix the login bug before the release.",
+    "Carol: The database migration is blocked on the security review.",
+    "Alice: Dana owns the customer follow up and will send notes by Tuesday.",
+]
+
+
+def make_transcript(words):
+    # A unique header per request keeps the analysis cache out of the numbers,
+    # and distinct turns keep compaction from folding the repeats away
+    lines = [f"Meeting {uuid.uuid4().hex}"]
+    total = 0
+    while total < words:
+        turn = (f"{SAMPLE_TURNS[len(lines) % len(SAMPLE_TURNS)]} "
+                f"Point {len(lines)} covers the {' '.join(random.sample(WORDS, 3))}.")
+        lines.append(turn)
+        total += len(turn.split())
+    return "\n".join(lines)
+
+
+def transcription_failed(text):
+    return not text or text.startswith("Transcription failed")
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(name, concurrency, latencies, elapsed, failures, retries_before):
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "failures": failures,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "latency_p50_s": round(percentile(latencies, 0.50), 4),
+        "latency_p95_s": round(percentile(latencies, 0.95), 4),
+        "latency_p99_s": round(percentile(latencies, 0.99), 4),
+        "retries": int(metrics.counter_value("meetingmind_http_retries_total") - retries_before),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_threaded(name, concurrency, requests, call):
+    retries_before = metrics.counter_value("meetingmind_http_retries_total")
+    latencies = []
+    failures = 0
+
+    def timed(index):
+        started = time.perf_counter()
+        ok = call(index)
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, ok in pool.map(timed, range(requests)):
+            latencies.append(latency)
+            failures += 0 if ok else 1
+    return summarize(name, concurrency, latencies, time.perf_counter() - started, failures, retries_before)
+
+
+def run_async(name, concurrency, requests, agent, transcript_words):
+    retries_before = metrics.counter_value("meetingmind_http_retries_total")
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with limit:
+                started = time.perf_counter()
+                result = await agent.analyze_meeting_multi_source_async(make_transcript(transcript_words))
+                return time.perf_counter() - started, not is_fallback(result)
+
+        return await asyncio.gather(*(timed() for _ in range(requests)))
+
+    started = time.perf_counter()
+    outcomes = transport.run(main())
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in outcomes]
+    failures = sum(1 for _, ok in outcomes if not ok)
+    return summarize(name, concurrency, latencies, elapsed, failures, retries_before)
+
+
+def run_suite(levels=DEFAULT_CONCURRENCY, requests_per_worker=4, latency=0.2, jitter=0.05, error_rate=0.0,
+              transcript_words=400, audio_bytes=256 * 1024, storm_seconds=2.0, retry_after=0.5):
+    server = MockOpenAIServer(latency=latency, jitter=jitter, error_rate=error_rate,
+                              retry_after=retry_after).start()
+    transport.configure(pool_size=max(levels))
+    # Memory-only caches so repeated runs always reach the mock server
+    analysis_agent = AnalysisAgent(max_workers=max(levels), cache=AnalysisCache(path=""),
+                                   base_url=server.base_url)
+    transcription_agent = TranscriptionAgent(max_workers=max(levels), cache=TranscriptCache(path=":memory:"),
+                                             base_url=server.base_url)
+    audio = b"\0" * audio_bytes
+
+    def analyze(_):
+        return not is_fallback(analysis_agent.analyze_meeting_multi_source(make_transcript(transcript_words)))
+
+    def transcribe(_):
+        upload = io.BytesIO(uuid.uuid4().bytes + audio)
+        upload.name = "bench.mp3"
+        return not transcription_failed(transcription_agent.transcribe_audio(upload))
+
+    results = []
+    try:
+        for level in levels:
+            requests = level * requests_per_worker
+            results.append(run_threaded("analysis", level, requests, analyze))
+            results.append(run_async("analysis_async", level, requests, analysis_agent, transcript_words))
+            results.append(run_threaded("transcription", level, requests, transcribe))
+
+        # Every call is refused with Retry-After until the storm passes
+        level = max(levels)
+        server.start_storm(storm_seconds)
+        results.append(run_threaded("analysis_429_storm", level, level * requests_per_worker, analyze))
+    finally:
+        server.stop()
+
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "levels": list(levels),
+            "requests_per_worker": requests_per_worker,
+            "latency_s": latency,
+            "jitter_s": jitter,
+            "error_rate": error_rate,
+            "transcript_words": transcript_words,
+            "audio_bytes": audio_bytes,
+            "storm_seconds": storm_seconds,
+            "retry_after_s": retry_after,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the agents against a local mock OpenAI server")
+    parser.add_argument("--levels", default=",".join(str(level) for level in DEFAULT_CONCURRENCY),
+                        help="comma separated concurrency levels")
+    parser.add_argument("--requests-per-worker", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock mean latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock 500 responses")
+    parser.add_argument("--transcript-words", type=int, default=400)
+    parser.add_argument("--audio-bytes", type=int, default=256 * 1024)
+    parser.add_argument("--storm-seconds", type=float, default=2.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        levels=[int(level) for level in args.levels.split(",") if level],
+        requests_per_worker=args.requests_per_worker, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, transcript_words=args.transcript_words, audio_bytes=args.audio_bytes,
+        storm_seconds=args.storm_seconds, retry_after=args.retry_after
+    )
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+    for row in report["results"]:
+        print(f"{row['scenario']:<20} c={row['concurrency']:<3} {row['throughput_rps']:>8.2f} req/s  "
+              f"p50 {row['latency_p50_s']:.3f}s  p95 {row['latency_p95_s']:.3f}s  p99 {row['latency_p99_s']:.3f}s  "
+              f"retries {row['retries']}  failures {row['failures']}  rss {row['peak_rss_mb']}MB")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
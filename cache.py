@@ -0,0 +1,210 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.getenv('MEETINGMIND_CACHE_DIR', '.cache')
+ANALYSIS_CACHE_SIZE = int(os.getenv('MEETINGMIND_ANALYSIS_CACHE_SIZE', '256'))
+ANALYSIS_CACHE_TTL = float(os.getenv('MEETINGMIND_ANALYSIS_CACHE_TTL', str(7 * 24 * 3600)))
+CHUNK_CACHE_SIZE = int(os.getenv('MEETINGMIND_CHUNK_CACHE_SIZE', '2048'))
+TRANSCRIPT_CACHE_BYTES = int(os.getenv('MEETINGMIND_TRANSCRIPT_CACHE_BYTES', str(200 * 1024 * 1024)))
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def normalize_content(content):
+    return re.sub(r"\s+", " ", content).strip()
+
+
+def analysis_key(content, meeting_type, model, prompt_version):
+    digest = hashlib.sha256()
+    for part in (normalize_content(content), meeting_type or "", model, str(prompt_version)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_digest(fileobj):
+    # Hash in blocks so large recordings are never held in memory at once
+    digest = hashlib.sha256()
+    start = fileobj.tell() if hasattr(fileobj, 'tell') else 0
+    for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(start)
+    return digest.hexdigest()
+
+
+def transcript_key(audio_digest, model, response_format):
+    return hashlib.sha256(f"{audio_digest}\0{model}\0{response_format}".encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, path=None, max_entries=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, 'analysis.sqlite3')
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis (key TEXT PRIMARY KEY, created REAL, value TEXT)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT created, value FROM analysis WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[0] <= self.ttl:
+                    value = json.loads(row[1])
+                    self._remember(key, row[0], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return copy.deepcopy(value)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, copy.deepcopy(value))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO analysis (key, created, value) VALUES (?, ?, ?)",
+                    (key, now, json.dumps(value))
+                )
+                self._db.execute("DELETE FROM analysis WHERE created < ?", (now - self.ttl,))
+                self._db.commit()
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+            }
+
+
+class TranscriptCache:
+    def __init__(self, path=None, max_bytes=TRANSCRIPT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, 'transcripts.sqlite3')
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts "
+            "(key TEXT PRIMARY KEY, size INTEGER, last_used REAL, value TEXT)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO transcripts (key, size, last_used, value) VALUES (?, ?, ?, ?)",
+                (key, size, time.time(), value)
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        # Drop least recently used transcripts until the total fits the budget
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM transcripts ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts").fetchone()
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+
+_analysis_cache = None
+_transcript_cache = None
+_chunk_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = AnalysisCache()
+    return _analysis_cache
+
+
+def get_transcript_cache():
+    global _transcript_cache
+    if _transcript_cache is None:
+        with _cache_lock:
+            if _transcript_cache is None:
+                _transcript_cache = TranscriptCache()
+    return _transcript_cache
+
+
+def get_chunk_cache():
+    # Per-chunk partial results behind incremental re-analysis
+    global _chunk_cache
+    if _chunk_cache is None:
+        with _cache_lock:
+            if _chunk_cache is None:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                _chunk_cache = AnalysisCache(os.path.join(CACHE_DIR, 'chunks.sqlite3'), max_entries=CHUNK_CACHE_SIZE)
+    return _chunk_cache
@@ -0,0 +1,153 @@
+import os
+import re
+import zlib
+
+from prompting import INPUT_TOKEN_BUDGET, count_tokens, truncate_to_tokens
+
+CHUNK_TOKENS = INPUT_TOKEN_BUDGET
+# Content-defined boundaries per chunk budget's worth of text, placed by hash
+# with odds proportional to each unit's tokens so unit size does not matter.
+# A chunk is at least a quarter of the budget; that minimum has to stay short
+# next to the gap between boundaries, or after an edit the cuts skip different
+# boundaries and take many chunks to line up again.
+BOUNDARIES_PER_CHUNK = float(os.getenv('MEETINGMIND_CHUNK_BOUNDARIES', '2'))
+# Denser backup boundaries, the fallback cut for a chunk that would overflow
+BACKUP_BOUNDARIES_PER_CHUNK = 4 * BOUNDARIES_PER_CHUNK
+
+SPEAKER_LINE = re.compile(r"^\s*[A-Z][\w .'-]{0,40}:\s")
+SENTENCE_OR_LINE = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
+LIST_FIELDS = ['key_decisions', 'attendees', 'next_steps', 'blockers', 'notes_insights']
+CONFIDENCE_ORDER = ['Low', 'Medium', 'High']
+
+
+def _units(content):
+    # Paragraphs first, then individual speaker turns inside each paragraph
+    units = []
+    for paragraph in re.split(r"\n\s*\n", content):
+        if not paragraph.strip():
+            continue
+        turn = []
+        for line in paragraph.splitlines():
+            if SPEAKER_LINE.match(line) and turn:
+                units.append("\n".join(turn))
+                turn = []
+            turn.append(line)
+        if turn:
+            units.append("\n".join(turn))
+    return units
+
+
+def _split_oversized(unit, max_tokens):
+    # Same content-defined rule as split_content, one sentence at a time, so
+    # an unlabelled transcript that is one huge unit still only re-chunks
+    # around an edit. Only a single sentence over the budget is cut blindly.
+    sentences = []
+    for sentence in SENTENCE_OR_LINE.split(unit):
+        if not sentence.strip():
+            continue
+        sentence_tokens = count_tokens(sentence)
+        while sentence_tokens > max_tokens:
+            piece = truncate_to_tokens(sentence, max_tokens)
+            sentences.append((piece, count_tokens(piece)))
+            sentence = sentence[len(piece):]
+            sentence_tokens = count_tokens(sentence)
+        sentences.append((sentence, sentence_tokens))
+    return _pack(sentences, max_tokens, " ")
+
+
+def _is_boundary(unit, tokens, max_tokens, per_chunk=BOUNDARIES_PER_CHUNK):
+    return zlib.crc32(_normalize(unit).encode('utf-8')) < 2 ** 32 * per_chunk * tokens / max_tokens
+
+
+def _pack(parts, max_tokens, separator):
+    # Past a quarter of the budget a chunk ends after any part whose hash hits
+    # the boundary mask. One that would overflow first falls back to the last
+    # part that hit the looser backup mask, so even forced cuts depend on
+    # content and line up with the previous chunking right after an edit.
+    chunks = []
+    current = []
+    current_tokens = 0
+    backup = 0
+    for text, tokens in parts:
+        while current and current_tokens + tokens > max_tokens:
+            cut = backup or len(current)
+            chunks.append(separator.join(part for part, _ in current[:cut]))
+            current = current[cut:]
+            current_tokens = sum(count for _, count in current)
+            backup = 0
+        current.append((text, tokens))
+        current_tokens += tokens
+        if current_tokens >= max_tokens // 4:
+            if _is_boundary(text, tokens, max_tokens):
+                chunks.append(separator.join(part for part, _ in current))
+                current, current_tokens, backup = [], 0, 0
+            elif _is_boundary(text, tokens, max_tokens, BACKUP_BOUNDARIES_PER_CHUNK):
+                backup = len(current)
+    if current:
+        chunks.append(separator.join(part for part, _ in current))
+    return chunks
+
+
+def split_content(content, max_tokens=CHUNK_TOKENS):
+    # Content-defined boundaries: an edit only moves the boundaries of the
+    # chunk it lands in and later chunks hash the same
+    units = [(unit, count_tokens(unit)) for unit in _units(content)]
+    if sum(tokens for _, tokens in units) <= max_tokens:
+        return ["\n\n".join(unit for unit, _ in units)] if units else []
+
+    parts = []
+    for unit, tokens in units:
+        if tokens > max_tokens:
+            parts.extend((piece, count_tokens(piece)) for piece in _split_oversized(unit, max_tokens))
+        else:
+            parts.append((unit, tokens))
+    return _pack(parts, max_tokens, "\n\n")
+
+
+def _normalize(text):
+    return re.sub(r"[^a-z0-9]+", " ", str(text).lower()).strip()
+
+
+def _dedupe(values):
+    seen = set()
+    unique = []
+    for value in values:
+        key = _normalize(value)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(value)
+    return unique
+
+
+def merge_results(results):
+    if len(results) == 1:
+        return results[0]
+
+    merged = {
+        "meeting_summary": " ".join(r.get('meeting_summary', '') for r in results if r.get('meeting_summary')),
+        "action_items": [],
+    }
+
+    for field in LIST_FIELDS:
+        merged[field] = _dedupe(value for r in results for value in r.get(field, []))
+
+    seen_tasks = {}
+    for result in results:
+        for item in result.get('action_items', []):
+            key = _normalize(item.get('task', ''))
+            if not key:
+                continue
+            if key in seen_tasks:
+                # Keep whichever copy actually names an owner / date
+                existing = seen_tasks[key]
+                for field in ('assignee', 'due_date'):
+                    if existing.get(field) in (None, '', 'Not specified') and item.get(field):
+                        existing[field] = item[field]
+                continue
+            seen_tasks[key] = dict(item)
+            merged['action_items'].append(seen_tasks[key])
+
+    scores = [r.get('confidence_score') for r in results if r.get('confidence_score') in CONFIDENCE_ORDER]
+    merged['confidence_score'] = min(scores, key=CONFIDENCE_ORDER.index) if scores else "Medium"
+    return merged
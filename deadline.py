@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from concurrent import futures as _futures
+
+TRANSCRIPTION_DEADLINE = float(os.getenv('MEETINGMIND_TRANSCRIPTION_DEADLINE_SECONDS', '600'))
+ANALYSIS_DEADLINE = float(os.getenv('MEETINGMIND_ANALYSIS_DEADLINE_SECONDS', '120'))
+# Each stage gets at most this much of whatever the request has left, so one
+# stalled call cannot eat the whole budget and leave nothing for a fallback
+STAGE_BUDGETS = {
+    "preprocess": 60.0,
+    "upload": float(os.getenv('MEETINGMIND_UPLOAD_BUDGET_SECONDS', '300')),
+    "network": float(os.getenv('MEETINGMIND_CALL_BUDGET_SECONDS', '60')),
+    "refetch": 20.0,
+}
+
+
+class Cancelled(Exception):
+    # The user stopped the request; never turned into a fallback result
+    pass
+
+
+class DeadlineExceeded(Exception):
+    # Out of time; callers degrade to whatever they already have
+    pass
+
+
+class Deadline:
+    # A point in time plus a cancel flag shared by everything working on one
+    # request. Stages take children with a tighter expiry; cancelling any of
+    # them cancels the whole request and runs the registered callbacks, which
+    # close in-flight responses so blocked reads return at once.
+    def __init__(self, seconds=None, parent=None):
+        self.parent = parent
+        self.expires = None if seconds is None else time.monotonic() + seconds
+        if parent is not None:
+            if parent.expires is not None and (self.expires is None or parent.expires < self.expires):
+                self.expires = parent.expires
+            self._root = parent._root
+        else:
+            self._root = self
+            self._event = threading.Event()
+            self._callbacks = []
+            self._lock = threading.Lock()
+            self.reason = None
+
+    @property
+    def cancelled(self):
+        return self._root._event.is_set()
+
+    @property
+    def expired(self):
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def remaining(self):
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def stage(self, name):
+        return Deadline(STAGE_BUDGETS.get(name), parent=self)
+
+    def check_cancelled(self):
+        # For error handlers: a failure caused by cancelling is a cancel, not a failure
+        if self.cancelled:
+            raise Cancelled(self._root.reason or "Cancelled")
+
+    def check(self):
+        self.check_cancelled()
+        if self.expired:
+            raise DeadlineExceeded("Deadline exceeded")
+
+    def timeout(self, default):
+        # An HTTP timeout that never outlives the deadline
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return min(default, max(remaining, 0.01))
+
+    def sleep(self, seconds):
+        # Returns early when cancelled; raises instead of sleeping past expiry
+        remaining = self.remaining()
+        if remaining is not None and seconds >= remaining:
+            self._root._event.wait(remaining)
+            self.check()
+            raise DeadlineExceeded("Deadline exceeded")
+        self._root._event.wait(seconds)
+        self.check()
+
+    def cancel(self, reason="Cancelled"):
+        root = self._root
+        with root._lock:
+            if root._event.is_set():
+                return
+            root.reason = reason
+            root._event.set()
+            callbacks = list(root._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback):
+        # Returns a function that unregisters the callback again
+        root = self._root
+        with root._lock:
+            if not root._event.is_set():
+                root._callbacks.append(callback)
+
+                def remove():
+                    with root._lock:
+                        if callback in root._callbacks:
+                            root._callbacks.remove(callback)
+                return remove
+        callback()
+        return lambda: None
+
+
+def resolve(deadline, seconds):
+    # Every request gets its default budget, capped by and cancellable through
+    # whatever deadline the caller passed in
+    return Deadline(seconds, parent=deadline)
+
+
+def completed(futures, deadline):
+    # as_completed that stops at the deadline: raises Cancelled the moment the
+    # request is cancelled and DeadlineExceeded once it runs out of time.
+    # stop only ever completes on cancel; the loop ends with the real futures.
+    futures = list(dict.fromkeys(futures))
+    if not futures:
+        return
+    stop = _futures.Future()
+    remove = deadline.on_cancel(lambda: stop.set_result(None))
+    try:
+        pending = len(futures)
+        for future in _futures.as_completed(futures + [stop], deadline.remaining()):
+            if future is stop:
+                deadline.check_cancelled()
+                continue
+            yield future
+            pending -= 1
+            if not pending:
+                return
+    except _futures.TimeoutError:
+        raise DeadlineExceeded("Deadline exceeded") from None
+    finally:
+        remove()
+
+
+def wait_for(future, deadline):
+    for done in completed([future], deadline):
+        return done.result()
@@ -0,0 +1,45 @@
+from collections import namedtuple
+
+ProgressEvent = namedtuple('ProgressEvent', ['stage', 'message', 'progress', 'data'])
+
+
+def emit(on_event, stage, message, progress=None, **data):
+    if on_event is not None:
+        on_event(ProgressEvent(stage, message, progress, data))
+
+
+class ProgressReader:
+    # Wraps an upload streamed through transport.MultipartBody, where each read
+    # is the next block handed to the socket, and reports every whole percent
+    def __init__(self, fileobj, on_event, total=None, start=0.0, end=1.0):
+        self._fileobj = fileobj
+        self._on_event = on_event
+        self._total = total
+        self._start = start
+        self._end = end
+        self.sent = 0
+        self._reported = -1
+
+    def read(self, size=-1):
+        chunk = self._fileobj.read(size)
+        if chunk:
+            self.sent += len(chunk)
+            if self._total:
+                percent = min(100, self.sent * 100 // self._total)
+                if percent == self._reported:
+                    return chunk
+                self._reported = percent
+            progress = None
+            if self._total:
+                progress = self._start + (self._end - self._start) * min(1.0, self.sent / self._total)
+            emit(self._on_event, "bytes_sent", f"Uploaded {self.sent / (1024 * 1024):.1f}MB", progress, sent=self.sent, total=self._total)
+        return chunk
+
+    def seek(self, offset, whence=0):
+        position = self._fileobj.seek(offset, whence)
+        self.sent = self._fileobj.tell()
+        self._reported = -1
+        return position
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
@@ -0,0 +1,167 @@
+import re
+
+from chunking import _dedupe
+
+SPEAKER = re.compile(r"^\s*(?:\[[^\]]*\]\s*)?([A-Z][\w.'-]*(?: [A-Z][\w.'-]*){0,2})\s*:\s+(\S.*)$")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+# Sentence-initial capitals the commitment pattern would otherwise take for a name
+NOT_ASSIGNEES = {"it", "this", "that", "there", "these", "those", "the", "he", "she", "they", "you", "everything",
+                 "nothing", "something", "which", "what", "who", "then", "also", "so", "and", "but", "ok", "okay"}
+NOT_SPEAKERS = {"action", "action item", "todo", "note", "notes", "decision", "blocker", "next steps", "agenda", "summary"}
+
+DAY = (r"(?:today|tonight|tomorrow|eod|eow|end of (?:the )?(?:day|week|month|quarter|sprint)"
+       r"|(?:next |this )?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|week|month|sprint)"
+       r"|\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?"
+       r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.? \d{1,2}(?:st|nd|rd|th)?)")
+COMMITMENT = re.compile(
+    r"(?:^|[,;]\s*|\b(?:so|and|then|ok(?:ay)?)\s+)"
+    r"(?P<who>(?-i:[Ii]|[Ww]e|[A-Z][a-z]+(?: [A-Z][a-z]+)?))\s+"
+    r"(?:will|'ll|am going to|is going to|are going to|needs? to|has to|have to|can take|takes?|owns?)\s+"
+    r"(?P<task>.+?)"
+    rf"(?:\s+(?:by|before|on|until|due)\s+(?P<due>{DAY}))?\s*[.!?]?$",
+    re.IGNORECASE
+)
+EXPLICIT_ACTION = re.compile(r"^(?:action(?: item)?|todo|to-do|ai)\s*[:\-]\s*(?P<task>.+)$", re.IGNORECASE)
+DUE_ANYWHERE = re.compile(rf"\b(?:by|before|on|due)\s+(?P<due>{DAY})\b", re.IGNORECASE)
+DECISION = re.compile(
+    r"\b(?:we (?:agreed|decided|will go with|are going with|settled on)|(?:decided|agreed) (?:to|that|on)"
+    r"|decision\s*:|let'?s go with|approved|final call)\b",
+    re.IGNORECASE
+)
+BLOCKER = re.compile(
+    r"\b(?:blocked (?:on|by)|blocker|blocking|waiting (?:on|for)|can'?t (?:proceed|continue|start|ship)"
+    r"|stuck on|depends on|dependency on)\b",
+    re.IGNORECASE
+)
+NEXT_STEP = re.compile(r"\b(?:next steps?|follow[- ]up|next (?:meeting|week|sync)|circle back)\b", re.IGNORECASE)
+HIGH_PRIORITY = re.compile(r"\b(?:urgent|asap|critical|immediately|top priority|blocker|p0|p1)\b", re.IGNORECASE)
+LOW_PRIORITY = re.compile(r"\b(?:when (?:you|we) (?:can|have time)|nice to have|low priority|eventually|someday)\b",
+                          re.IGNORECASE)
+
+HINT_ITEMS = 8
+
+
+def _lines(content):
+    # (speaker, text) for every sentence; the speaker carries over until the next "Name:" prefix
+    speaker = None
+    for line in content.splitlines():
+        match = SPEAKER.match(line)
+        if match and match.group(1).lower() not in NOT_SPEAKERS and not match.group(1).isupper():
+            speaker, line = match.group(1), match.group(2)
+        elif not line.strip() or line.rstrip().endswith(":") and line.strip().isupper():
+            # Blank lines and section labels end the current speaker's turn
+            speaker = None
+            continue
+        for sentence in SENTENCE_SPLIT.split(line.strip()):
+            if sentence:
+                yield speaker, sentence
+
+
+def _priority(sentence):
+    if HIGH_PRIORITY.search(sentence):
+        return "High"
+    if LOW_PRIORITY.search(sentence):
+        return "Low"
+    return "Medium"
+
+
+def _action_item(speaker, sentence):
+    explicit = EXPLICIT_ACTION.match(sentence)
+    if explicit:
+        # Whoever reads out an action item is not necessarily its owner
+        task = explicit.group("task").rstrip(". ")
+        due = DUE_ANYWHERE.search(task)
+        return {"task": task[:1].upper() + task[1:], "assignee": "Not specified",
+                "due_date": due.group("due") if due else "Not specified", "priority": _priority(sentence)}
+
+    match = COMMITMENT.search(sentence)
+    if not match or len(match.group("task").split()) < 2:
+        return None
+    who = match.group("who")
+    if who.split()[0].lower() in NOT_ASSIGNEES:
+        return None
+    if who.lower() == "i":
+        who = speaker or "Not specified"
+    elif who.lower() == "we":
+        who = "Team"
+    task = match.group("task").rstrip(". ")
+    due = match.group("due")
+    if not due:
+        anywhere = DUE_ANYWHERE.search(task)
+        due = anywhere.group("due") if anywhere else None
+    return {"task": task[:1].upper() + task[1:], "assignee": who,
+            "due_date": due or "Not specified", "priority": _priority(sentence)}
+
+
+def extract_meeting(content):
+    speakers = []
+    items = []
+    decisions = []
+    blockers = []
+    next_steps = []
+    for speaker, sentence in _lines(content):
+        if speaker:
+            speakers.append(speaker)
+        if DECISION.search(sentence):
+            decisions.append(sentence)
+        if BLOCKER.search(sentence):
+            blockers.append(sentence)
+        item = _action_item(speaker, sentence)
+        if item is not None:
+            items.append(item)
+        elif NEXT_STEP.search(sentence):
+            next_steps.append(sentence)
+
+    seen = set()
+    unique_items = []
+    for item in items:
+        key = item["task"].lower()
+        if key not in seen:
+            seen.add(key)
+            unique_items.append(item)
+
+    return {
+        "attendees": _dedupe(speakers),
+        "action_items": unique_items,
+        "key_decisions": _dedupe(decisions),
+        "blockers": _dedupe(blockers),
+        "next_steps": _dedupe(next_steps),
+    }
+
+
+def rule_based_result(content):
+    # The degraded-mode answer when the model cannot be reached: only what the
+    # rules actually found, clearly labelled and with low confidence
+    extracted = extract_meeting(content)
+    summary = (f"AI analysis was unavailable; extracted locally from the text: {len(extracted['attendees'])} speakers, "
+               f"{len(extracted['action_items'])} action items, {len(extracted['key_decisions'])} decisions, "
+               f"{len(extracted['blockers'])} blockers.")
+    return dict(
+        extracted,
+        meeting_summary=summary,
+        confidence_score="Low",
+        notes_insights=["Rule-based extraction; re-run the analysis for a full summary"],
+        fallback=True,
+    )
+
+
+def is_fallback(result):
+    return bool(result and result.get("fallback"))
+
+
+def prompt_hints(content):
+    # A compact pre-pass the model can confirm or correct instead of
+    # discovering speakers and commitments from scratch
+    extracted = extract_meeting(content)
+    parts = []
+    if extracted["attendees"]:
+        parts.append("speakers: " + ", ".join(extracted["attendees"][:HINT_ITEMS]))
+    if extracted["action_items"]:
+        tasks = [f"{item['assignee']}: {item['task']}" + (f" ({item['due_date']})" if item['due_date'] != "Not specified" else "")
+                 for item in extracted["action_items"][:HINT_ITEMS]]
+        parts.append("possible tasks: " + "; ".join(tasks))
+    if extracted["key_decisions"]:
+        parts.append("possible decisions: " + "; ".join(extracted["key_decisions"][:HINT_ITEMS]))
+    if extracted["blockers"]:
+        parts.append("possible blockers: " + "; ".join(extracted["blockers"][:HINT_ITEMS]))
+    return "\n".join(parts)
@@ -1,16 +1,274 @@
 import os
 from dotenv import load_dotenv
-import json
-import requests
+import asyncio
+import copy
+import logging
+import tempfile
+import time
+from contextlib import contextmanager
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import transport
+from audio import (MAX_SEGMENT_BYTES, PREPROCESS_AUDIO, SEGMENT_SECONDS, is_wav, preprocess_wav, stitch_transcripts,
+                   wav_duration, write_wav_segments)
+from cache import analysis_key, file_digest, get_analysis_cache, get_chunk_cache, get_transcript_cache, transcript_key
+from chunking import split_content, merge_results
+from deadline import ANALYSIS_DEADLINE, TRANSCRIPTION_DEADLINE, Cancelled, DeadlineExceeded, completed, resolve
+from events import ProgressReader, emit
+from extraction import extract_meeting, prompt_hints, rule_based_result
+from prompting import PromptBuilder, count_tokens
+from ratelimit import INTERACTIVE, get_limiter
+from routing import get_router
+from schema import fill_invalid, parse_json, validate_result
+from similarity import get_similarity_index, related_context
+from singleflight import LEADER_CANCELLED, get_flight, wait_result
+from store import content_hash
+from streaming import IncrementalJSONParser, iter_sse_deltas
 
 load_dotenv()
 
+logger = logging.getLogger("meetingmind.agents")
+
+API_BASE_URL = os.getenv('OPENAI_BASE_URL', "https://api.openai.com/v1")
+TRANSCRIPTION_MODEL = "whisper-1"
+TRANSCRIPTION_FORMAT = "text"
+# Bump whenever the analysis prompt changes so cached results are not reused
+PROMPT_VERSION = 7
+
+def request_cost(data):
+    # What the tokens-per-minute quota charges: the prompt plus max_tokens
+    prompt = sum(count_tokens(message["content"]) for message in data["messages"])
+    return prompt + data.get("max_tokens", 0)
+
+def chunk_key(chunk, route):
+    return analysis_key(chunk, f"chunk:{route.template}", route.profile, PROMPT_VERSION)
+
+def cache_lookup(cache, key, name, record):
+    value = cache.get(key)
+    result = "hit" if value is not None else "miss"
+    metrics.inc("meetingmind_cache_lookups_total", cache=name, result=result)
+    record.set(cache=result)
+    return value
+
+def begin_request(kind, cache, name, make_key, on_event, deadline, seconds, **fields):
+    # The front of every entry point: the request record and its deadline, then
+    # the cache. Returns (record, key, cached); a hit is already reported.
+    record = metrics.RequestRecord(kind, **fields)
+    record.deadline = resolve(deadline, seconds)
+    key = make_key(record)
+    cached = cache_lookup(cache, key, name, record)
+    if cached is not None:
+        emit(on_event, "cache_hit", f"Loaded cached {name}", 1.0)
+        record.finish("cache_hit")
+    return record, key, cached
+
+@contextmanager
+def finish_on_error(record):
+    # Whoever runs the request owns its record, so one that dies on the way ends it
+    try:
+        yield
+    except (Cancelled, asyncio.CancelledError):
+        record.finish("cancelled")
+        raise
+    except Exception:
+        record.finish("error")
+        raise
+
+@contextmanager
+def _joining(on_event, record):
+    joined = []
+    def on_join():
+        joined.append(True)
+        emit(on_event, "coalesced", "Joining an identical request already in progress", 0.1)
+    try:
+        yield on_join
+    except BaseException:
+        if joined:
+            record.finish("error")
+        raise
+
+def _shared_result(result, shared, on_event, record):
+    if shared:
+        emit(on_event, "completed", "Result shared from the identical request", 1.0)
+        record.finish("coalesced")
+        return copy.deepcopy(result)
+    return result
+
+def coalesce(flight, key, fn, on_event, record):
+    # Identical requests already in flight anywhere in the process share one
+    # upstream call; the leader owns the record, followers finish their own
+    with _joining(on_event, record) as on_join:
+        result, shared = flight.do(key, fn, on_join, record.deadline)
+    return _shared_result(result, shared, on_event, record)
+
+async def coalesce_async(flight, key, coro_fn, on_event, record):
+    with _joining(on_event, record) as on_join:
+        result, shared = await flight.do_async(key, coro_fn, on_join)
+    return _shared_result(result, shared, on_event, record)
+
 class TranscriptionAgent:
-    def __init__(self):
+    def __init__(self, cache=None, max_workers=None, base_url=None, priority=INTERACTIVE):
         self.api_key = os.getenv('OPENAI_API_KEY')
+        self.base_url = (base_url or API_BASE_URL).rstrip('/')
+        self.priority = priority
+        self.limiter = get_limiter(TRANSCRIPTION_MODEL)
+        self.flight = get_flight("transcription")
+        self.cache = cache if cache is not None else get_transcript_cache()
+        self.max_workers = max_workers or int(os.getenv('MEETINGMIND_TRANSCRIPTION_WORKERS', '4'))
+        self._semaphore = transport.LoopSemaphore(self.max_workers)
+    
+    def transcribe_audio(self, audio_file, on_event=None, deadline=None):
+        record, key, cached = self._begin(lambda: file_digest(audio_file), on_event, deadline)
+        if cached is not None:
+            return cached
+        
+        def transcribe():
+            with finish_on_error(record):
+                text = self._request(audio_file, on_event, record)
+            return self._finish(key, text, on_event, record)
+        return coalesce(self.flight, key, transcribe, on_event, record)
     
-    def transcribe_audio(self, audio_file):
-        url = "https://api.openai.com/v1/audio/transcriptions"
+    def transcribe_file(self, path, on_event=None, deadline=None):
+        def digest():
+            with open(path, 'rb') as audio_file:
+                return file_digest(audio_file)
+        record, key, cached = self._begin(digest, on_event, deadline, bytes=os.path.getsize(path))
+        if cached is not None:
+            return cached
+        
+        def transcribe():
+            with finish_on_error(record), tempfile.TemporaryDirectory() as work_dir:
+                upload_path = self._preprocess(path, work_dir, on_event, record)
+                if is_wav(upload_path) and (wav_duration(upload_path) > SEGMENT_SECONDS
+                                            or os.path.getsize(upload_path) > MAX_SEGMENT_BYTES):
+                    text = self._transcribe_segmented(upload_path, on_event, record)
+                else:
+                    with open(upload_path, 'rb') as audio_file:
+                        text = self._request(audio_file, on_event, record)
+            return self._finish(key, text, on_event, record)
+        return coalesce(self.flight, key, transcribe, on_event, record)
+    
+    def _begin(self, digest, on_event, deadline, **fields):
+        emit(on_event, "hashing", "Checking for an existing transcript", 0.02)
+        def make_key(record):
+            with record.stage("hash"):
+                return transcript_key(digest(), TRANSCRIPTION_MODEL, TRANSCRIPTION_FORMAT)
+        return begin_request("transcription", self.cache, "transcript", make_key, on_event, deadline,
+                             TRANSCRIPTION_DEADLINE, model=TRANSCRIPTION_MODEL, **fields)
+    
+    def _preprocess(self, path, work_dir, on_event, record):
+        # Mono 16 kHz with the dead air cut out uploads a fraction of the bytes;
+        # anything we cannot decode, or would not shrink, goes up unchanged
+        if not PREPROCESS_AUDIO or not is_wav(path):
+            return path
+        emit(on_event, "preprocessing", "Downsampling and removing silence", 0.03)
+        out_path = os.path.join(work_dir, "preprocessed.wav")
+        try:
+            with record.stage("preprocess"):
+                report = preprocess_wav(path, out_path, deadline=record.deadline.stage("preprocess"))
+        except Exception:
+            record.deadline.check_cancelled()
+            logger.warning("Audio preprocessing failed, uploading the original", exc_info=True)
+            metrics.inc("meetingmind_errors_total", stage="preprocess")
+            return path
+        if not report["voiced"] or report["saved_bytes"] <= 0:
+            return path
+        metrics.inc("meetingmind_audio_bytes_saved_total", report["saved_bytes"])
+        record.set(bytes_saved=report["saved_bytes"], audio_seconds=round(report["input_seconds"], 2),
+                   speech_seconds=round(report["output_seconds"], 2))
+        emit(on_event, "preprocessed",
+             f"Upload reduced by {report['saved_bytes'] / 1048576:.1f} MB "
+             f"({report['input_seconds'] - report['output_seconds']:.0f}s of silence removed)", 0.05,
+             saved_bytes=report["saved_bytes"])
+        return out_path
+    
+    def _finish(self, key, text, on_event, record):
+        if text is None:
+            emit(on_event, "failed", "Transcription failed", 1.0)
+            record.finish("failed")
+            return "Transcription failed"
+        
+        self.cache.put(key, text)
+        emit(on_event, "completed", "Transcript ready", 1.0)
+        record.finish("ok")
+        return text
+    
+    def _transcribe_segmented(self, path, on_event, record):
+        with tempfile.TemporaryDirectory() as segment_dir:
+            pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            try:
+                # Segments are submitted as soon as they are written, so
+                # uploads overlap with cutting the rest of the recording
+                futures = {
+                    pool.submit(self._transcribe_segment, segment_path, record): index
+                    for index, _, segment_path in write_wav_segments(path, segment_dir)
+                }
+                record.set(segments=len(futures))
+                emit(on_event, "upload_started", f"Transcribing {len(futures)} segments", 0.05, segments=len(futures))
+                texts = [None] * len(futures)
+                for done, future in enumerate(completed(futures, record.deadline), 1):
+                    texts[futures[future]] = future.result()
+                    emit(on_event, "segment_done", f"Segment {done}/{len(futures)} transcribed",
+                         0.05 + 0.9 * done / len(futures), done=done, total=len(futures))
+            finally:
+                # Not waiting for uploads still running: they stop at the deadline
+                # on their own, and a cancel should free this worker at once
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        if any(text is None for text in texts):
+            return None
+        emit(on_event, "parsed", "Stitching segment transcripts", 0.97)
+        return stitch_transcripts(texts)
+    
+    def _transcribe_segment(self, segment_path, record):
+        with open(segment_path, 'rb') as segment_file:
+            return self._request(segment_file, None, record)
+    
+    async def transcribe_audio_async(self, audio_file, on_event=None, deadline=None):
+        record, key, cached = self._begin(lambda: file_digest(audio_file), on_event, deadline, mode="async")
+        if cached is not None:
+            return cached
+        
+        async def transcribe():
+            with finish_on_error(record):
+                async with self._semaphore.get():
+                    emit(on_event, "upload_started", "Uploading recording", 0.05)
+                    url, headers, files = self._build_request(audio_file)
+                    with record.stage("upload"):
+                        response = await transport.apost(url, headers=headers, files=files,
+                                                         **self._call_options(record))
+                    text = self._received(response, on_event, record)
+            return self._finish(key, text, on_event, record)
+        return await coalesce_async(self.flight, key, transcribe, on_event, record)
+    
+    def _request(self, audio_file, on_event, record):
+        if on_event is not None:
+            # BytesIO (and Streamlit's UploadedFile) has fileno() but no descriptor
+            total = audio_file.seek(0, 2)
+            audio_file.seek(0)
+            audio_file = ProgressReader(audio_file, on_event, total, start=0.05, end=0.3)
+        
+        emit(on_event, "upload_started", "Uploading recording", 0.05)
+        url, headers, files = self._build_request(audio_file)
+        body = transport.MultipartBody(files)
+        headers["Content-Type"] = body.content_type
+        # Whisper's upload and processing are one round trip
+        with record.stage("upload"):
+            response = transport.post(url, headers=headers, data=body, **self._call_options(record))
+        return self._received(response, on_event, record)
+    
+    def _call_options(self, record):
+        return {"limiter": self.limiter, "priority": self.priority, "deadline": record.deadline.stage("upload")}
+    
+    def _received(self, response, on_event, record):
+        record.add_call(response)
+        emit(on_event, "response_received", "Transcription received", 0.95, status=response.status_code)
+        return response.text if response.status_code == 200 else None
+    
+    def _build_request(self, audio_file):
+        url = f"{self.base_url}/audio/transcriptions"
         
         headers = {
             "Authorization": f"Bearer {self.api_key}"
@@ -18,103 +276,459 @@ class TranscriptionAgent:
         
         files = {
             "file": audio_file,
-            "model": (None, "whisper-1"),
-            "response_format": (None, "text")
+            "model": (None, TRANSCRIPTION_MODEL),
+            "response_format": (None, TRANSCRIPTION_FORMAT)
         }
         
-        response = requests.post(url, headers=headers, files=files)
-        return response.text if response.status_code == 200 else "Transcription failed"
+        return url, headers, files
 
 class AnalysisAgent:
-    def __init__(self):
+    def __init__(self, max_workers=None, cache=None, base_url=None, priority=INTERACTIVE, chunk_cache=None,
+                 related_index=None, router=None):
         self.api_key = os.getenv('OPENAI_API_KEY')
+        self.base_url = (base_url or API_BASE_URL).rstrip('/')
+        self.priority = priority
+        self.router = router if router is not None else get_router()
+        self.limiter = get_limiter(self.router.fast_model)
+        self.flight = get_flight("analysis")
+        self.max_workers = max_workers or int(os.getenv('MEETINGMIND_ANALYSIS_WORKERS', '4'))
+        self.cache = cache if cache is not None else get_analysis_cache()
+        self.chunk_cache = chunk_cache if chunk_cache is not None else get_chunk_cache()
+        self.related_index = related_index if related_index is not None else get_similarity_index()
+        self.prompt_builder = PromptBuilder()
+        self._semaphore = transport.LoopSemaphore(self.max_workers)
+    
+    def analyze_meeting_multi_source(self, content, meeting_type="general", sources=None, on_event=None,
+                                     deadline=None):
+        route, record, key, cached = self._begin(content, meeting_type, on_event, deadline)
+        if cached is not None:
+            return cached
+        
+        def analyze():
+            with finish_on_error(record):
+                context = self._related(content, meeting_type, record)
+                result, complete = self._analyze(self._prepare(content, record), route, on_event, record, context)
+            return self._finish(key, content, result, complete, on_event, record)
+        return coalesce(self.flight, key, analyze, on_event, record)
+    
+    def _begin(self, content, meeting_type, on_event, deadline, **fields):
+        # Returns (route, record, key, cached)
+        route = self.router.route(meeting_type, count_tokens(content))
+        emit(on_event, "started", "Preparing analysis", 0.02)
+        record, key, cached = begin_request(
+            "analysis", self.cache, "analysis",
+            lambda record: analysis_key(content, meeting_type, route.profile, PROMPT_VERSION), on_event, deadline,
+            ANALYSIS_DEADLINE, model=route.model, meeting_type=meeting_type, **fields)
+        return route, record, key, cached
     
-    def analyze_meeting_multi_source(self, content, meeting_type="general", sources=None):
-        url = "https://api.openai.com/v1/chat/completions"
+    def _analyze(self, chunks, route, on_event, record, context=""):
+        total = len(chunks)
+        record.set(chunks=total)
+        
+        if total == 1:
+            results = [self._analyze_chunk(chunks[0], route, 1, 1, record, on_event, context)]
+        else:
+            results = self._reuse_chunks(chunks, route, on_event, record)
+            pending = [index for index, result in enumerate(results) if result is None]
+            if pending:
+                emit(on_event, "upload_started", f"Analyzing {len(pending)} chunks in parallel", 0.05, chunks=len(pending))
+                # Chunks are independent, so wall-clock time follows the slowest one
+                pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending)))
+                futures = {
+                    pool.submit(self._analyze_chunk, chunks[index], route, index + 1, total, record, None, context):
+                        index
+                    for index in pending
+                }
+                try:
+                    # Events are emitted from the calling thread so UI callbacks stay safe
+                    for done, future in enumerate(completed(futures, record.deadline), 1):
+                        index = futures[future]
+                        results[index] = self._store_chunk(chunks[index], route, future.result())
+                        emit(on_event, "chunk_done", f"Chunk {done}/{len(pending)} analyzed",
+                             0.05 + 0.9 * done / len(pending), done=done, total=len(pending))
+                except DeadlineExceeded:
+                    # Out of time: merge what finished, the rest is filled by the rules
+                    late = sum(1 for future in futures if not future.done())
+                    logger.warning("Analysis deadline reached with %d chunks outstanding", late)
+                    metrics.inc("meetingmind_deadline_exceeded_total", stage="analysis_chunks")
+                    record.set(late_chunks=late)
+                finally:
+                    pool.shutdown(wait=False, cancel_futures=True)
+        
+        return self._reduce(results, chunks)
+    
+    def _reuse_chunks(self, chunks, route, on_event, record):
+        # Boundaries are content-defined, so after an edit only the chunks it
+        # touched miss here and go back to the model
+        results = [self.chunk_cache.get(chunk_key(chunk, route)) for chunk in chunks]
+        reused = sum(1 for result in results if result is not None)
+        metrics.inc("meetingmind_cache_lookups_total", reused, cache="chunk", result="hit")
+        metrics.inc("meetingmind_cache_lookups_total", len(chunks) - reused, cache="chunk", result="miss")
+        record.set(chunks_reused=reused)
+        if reused:
+            emit(on_event, "chunks_reused", f"Reusing {reused} of {len(chunks)} unchanged chunks", 0.05,
+                 reused=reused, total=len(chunks))
+        return results
+    
+    def _store_chunk(self, chunk, route, result):
+        if result is not None:
+            self.chunk_cache.put(chunk_key(chunk, route), result)
+        return result
+    
+    async def analyze_meeting_multi_source_async(self, content, meeting_type="general", sources=None, on_event=None,
+                                                 deadline=None):
+        route, record, key, cached = self._begin(content, meeting_type, on_event, deadline, mode="async")
+        if cached is not None:
+            return cached
+        
+        async def analyze():
+            with finish_on_error(record):
+                context = self._related(content, meeting_type, record)
+                chunks = self._prepare(content, record)
+                total = len(chunks)
+                record.set(chunks=total)
+                results = self._reuse_chunks(chunks, route, on_event, record) if total > 1 else [None]
+                pending = [index for index, result in enumerate(results) if result is None]
+                finished = []
+                
+                async def run_chunk(index):
+                    result = await self._analyze_chunk_async(chunks[index], route, index + 1, total, record, context)
+                    if total > 1:
+                        self._store_chunk(chunks[index], route, result)
+                    finished.append(index)
+                    emit(on_event, "chunk_done", f"Chunk {len(finished)}/{len(pending)} analyzed",
+                         0.05 + 0.9 * len(finished) / len(pending), done=len(finished), total=len(pending))
+                    return result
+                
+                # Cancelling the caller cancels every in-flight chunk request with it
+                fresh = await asyncio.gather(*(run_chunk(index) for index in pending))
+            for index, result in zip(pending, fresh):
+                results[index] = result
+            
+            result, complete = self._reduce(results, chunks)
+            return self._finish(key, content, result, complete, on_event, record)
+        
+        return await coalesce_async(self.flight, key, analyze, on_event, record)
+    
+    def _finish(self, key, content, result, complete, on_event, record):
+        if result is None:
+            emit(on_event, "failed", "Analysis failed, showing locally extracted result", 1.0)
+            metrics.inc("meetingmind_fallbacks_total")
+            with record.stage("extract"):
+                result = rule_based_result(content)
+            record.finish("fallback")
+            return result
+        
+        # Partial merges (some chunks failed) are returned but never cached
+        if complete:
+            self.cache.put(key, result)
+        emit(on_event, "completed", "Analysis complete", 1.0)
+        record.finish("ok" if complete else "partial")
+        return result
+    
+    def analyze_meeting_stream(self, content, meeting_type="general", sources=None, on_event=None, deadline=None):
+        # Yields ("field", name, value) and ("item", name, value) as the model
+        # writes them, then ("result", None, analysis) with the full result
+        route, record, key, cached = self._begin(content, meeting_type, on_event, deadline, mode="stream")
+        if cached is not None:
+            yield "result", None, cached
+            return
+        
+        call, leader = self.flight.begin(key)
+        if not leader:
+            yield "result", None, self._follow(call, content, meeting_type, sources, on_event, record)
+            return
+        
+        resolved = False
+        try:
+            for kind, name, value in self._stream(key, route, content, meeting_type, on_event, record):
+                if kind == "result":
+                    # Release waiting callers before our own consumer renders
+                    self.flight.end(key, call, value)
+                    resolved = True
+                yield kind, name, value
+        finally:
+            if not resolved:
+                # Abandoned mid-stream; waiting callers run the request themselves
+                self.flight.end(key, call, error=FutureCancelledError())
+    
+    def _follow(self, call, content, meeting_type, sources, on_event, record):
+        emit(on_event, "coalesced", "Joining an identical request already in progress", 0.1)
+        try:
+            result = wait_result(call, record.deadline)
+        except LEADER_CANCELLED:
+            record.finish("cancelled")
+            record.deadline.check_cancelled()
+            return self.analyze_meeting_multi_source(content, meeting_type, sources, on_event, record.deadline)
+        except BaseException:
+            record.finish("error")
+            raise
+        emit(on_event, "completed", "Result shared from the identical request", 1.0)
+        record.finish("coalesced")
+        return copy.deepcopy(result)
+    
+    def _stream(self, key, route, content, meeting_type, on_event, record):
+        context = self._related(content, meeting_type, record)
+        chunks = self._prepare(content, record)
+        if len(chunks) > 1:
+            # Chunk results only become meaningful after the merge
+            with finish_on_error(record):
+                result, complete = self._analyze(chunks, route, on_event, record, context)
+            yield "result", None, self._finish(key, content, result, complete, on_event, record)
+            return
+        
+        url, headers, data = self._build_request(chunks[0], route, 1, 1, context)
+        data["stream"] = True
+        result = remove = None
+        try:
+            emit(on_event, "upload_started", "Sending meeting content to the model", 0.1)
+            with record.stage("network"):
+                response = transport.post(url, headers=headers, json=data, stream=True,
+                                          **self._call_options(route, data, record, "network"))
+            record.add_call(response)
+            # Closing the response is what unblocks a read stuck on the socket
+            remove = record.deadline.on_cancel(response.close)
+            with response:
+                if response.status_code == 200:
+                    emit(on_event, "response_received", "Model is responding", 0.2)
+                    parser = IncrementalJSONParser()
+                    with record.stage("stream"):
+                        for delta in iter_sse_deltas(response):
+                            record.deadline.check()
+                            for kind, name, value in parser.feed(delta):
+                                emit(on_event, "field_received", f"Received {name.replace('_', ' ')}", None, field=name)
+                                yield kind, name, value
+                    # The raw text, so a reply cut off at max_tokens can still be repaired
+                    result = self._complete(chunks[0], route, self._parse_text(parser.buffer, record), record)
+            if result is not None:
+                emit(on_event, "parsed", "Parsed analysis result", 0.95)
+        except Exception:
+            if record.deadline.cancelled:
+                record.finish("cancelled")
+                record.deadline.check_cancelled()
+            logger.warning("Streaming analysis failed", exc_info=True)
+            metrics.inc("meetingmind_errors_total", stage="analysis_stream")
+            result = None
+        finally:
+            if remove is not None:
+                remove()
+        if self.router.should_escalate(route, result, record.elapsed(), record.deadline.remaining()):
+            result = self._escalate(chunks[0], route, 1, 1, record, on_event, context, result)
+        
+        yield "result", None, self._finish(key, content, result, result is not None, on_event, record)
+    
+    def _reduce(self, results, chunks):
+        succeeded = [r for r in results if r is not None]
+        if not succeeded:
+            return None, False
+        # Chunks the model failed on still contribute what the rules find in them
+        filled = [r if r is not None else dict(extract_meeting(chunk), confidence_score="Low")
+                  for r, chunk in zip(results, chunks)]
+        return merge_results(filled), len(succeeded) == len(results)
+    
+    def _analyze_chunk(self, content, route, part, total, record, on_event=None, context=""):
+        result = self._request_chunk(content, route, part, total, record, on_event, context)
+        if self.router.should_escalate(route, result, record.elapsed(), record.deadline.remaining()):
+            result = self._escalate(content, route, part, total, record, on_event, context, result)
+        return result
+    
+    def _escalate(self, content, route, part, total, record, on_event, context, result):
+        # The fast answer failed or came back unsure; ask the strong model once
+        emit(on_event, "escalating", f"Retrying with {route.escalate_to}", None, model=route.escalate_to)
+        stronger = self._request_chunk(content, route.escalated(), part, total, record, on_event, context)
+        return self._escalated(route, record, result, stronger)
+    
+    def _escalated(self, route, record, result, stronger):
+        metrics.inc("meetingmind_escalations_total", model=route.escalate_to,
+                    outcome="failed" if stronger is None else "used")
+        record.set(escalated=route.escalate_to)
+        return stronger if stronger is not None else result
+    
+    def _request_chunk(self, content, route, part, total, record, on_event=None, context=""):
+        url, headers, data = self._build_request(content, route, part, total, context)
+        with self._chunk_attempt(part, total, record):
+            emit(on_event, "upload_started", "Sending meeting content to the model", 0.1)
+            started = time.perf_counter()
+            with record.stage("network"):
+                response = transport.post(url, headers=headers, json=data,
+                                          **self._call_options(route, data, record, "network"))
+            parsed = self._received(response, record, route, started)
+            emit(on_event, "response_received", "Model response received", 0.85, status=response.status_code)
+            result = self._complete(content, route, parsed, record)
+            if result is not None:
+                emit(on_event, "parsed", "Parsed analysis result", 0.95)
+            return result
+        return None
+    
+    @contextmanager
+    def _chunk_attempt(self, part, total, record):
+        # A chunk that fails or runs out of time comes back as None for the
+        # rules to fill in; only a cancel gets through
+        try:
+            yield
+        except DeadlineExceeded:
+            logger.warning("Analysis of chunk %d/%d ran out of time", part, total)
+            metrics.inc("meetingmind_deadline_exceeded_total", stage="analysis_chunk")
+        except Exception:
+            record.deadline.check_cancelled()
+            logger.warning("Analysis of chunk %d/%d failed", part, total, exc_info=True)
+            metrics.inc("meetingmind_errors_total", stage="analysis_chunk")
+    
+    def _received(self, response, record, route, started):
+        seconds = time.perf_counter() - started
+        record.add_call(response)
+        return self._parse_response(response, record, route, seconds)
+    
+    async def _analyze_chunk_async(self, content, route, part, total, record, context=""):
+        result = await self._request_chunk_async(content, route, part, total, record, context)
+        if self.router.should_escalate(route, result, record.elapsed(), record.deadline.remaining()):
+            stronger = await self._request_chunk_async(content, route.escalated(), part, total, record, context)
+            result = self._escalated(route, record, result, stronger)
+        return result
+    
+    async def _request_chunk_async(self, content, route, part, total, record, context=""):
+        url, headers, data = self._build_request(content, route, part, total, context)
+        with self._chunk_attempt(part, total, record):
+            async with self._semaphore.get():
+                started = time.perf_counter()
+                with record.stage("network"):
+                    response = await transport.apost(url, headers=headers, json=data,
+                                                     **self._call_options(route, data, record, "network"))
+                parsed = self._received(response, record, route, started)
+            return await self._complete_async(content, route, parsed, record)
+        return None
+    
+    def _related(self, content, meeting_type, record):
+        # Background from similar past meetings; deliberately not part of any
+        # cache key, so new history never invalidates cached chunk results
+        if self.related_index is None:
+            return ""
+        with record.stage("related"):
+            related = self.related_index.search(content, exclude_hash=content_hash(content, meeting_type))
+        record.set(related=len(related))
+        return related_context(related)
+    
+    def _prepare(self, content, record):
+        with record.stage("prepare"):
+            compacted = self.prompt_builder.compact(content)
+            return split_content(compacted) or [compacted or content]
+    
+    def _build_request(self, content, route, part, total, context=""):
+        messages, max_tokens = self.prompt_builder.build(content, part, total, context, prompt_hints(content),
+                                                         route.focus, route.max_output_tokens)
+        return self._chat_request(route.model, messages, max_tokens)
+    
+    def _build_field_request(self, content, route, fields):
+        messages, max_tokens = self.prompt_builder.build_fields(content, fields)
+        return self._chat_request(route.model, messages, max_tokens)
+    
+    def _call_options(self, route, data, record, stage):
+        # Everything a model call hands the transport besides the request itself
+        return {"limiter": get_limiter(route.model), "cost": request_cost(data), "priority": self.priority,
+                "deadline": record.deadline.stage(stage)}
+    
+    def _chat_request(self, model, messages, max_tokens):
+        url = f"{self.base_url}/chat/completions"
         
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
         
-        prompt = f"""
-        Analyze this meeting content and respond with ONLY valid JSON:
-        
-        {content[:2000]}
-        
-        {{
-            "meeting_summary": "Brief summary here",
-            "key_decisions": ["Decision 1", "Decision 2"],
-            "action_items": [
-                {{
-                    "task": "Task description",
-                    "assignee": "Person name",
-                    "due_date": "Date or 'Not specified'",
-                    "priority": "High/Medium/Low"
-                }}
-            ],
-            "attendees": ["Person 1", "Person 2"],
-            "next_steps": ["Complete step 1", "Complete step 2"],
-            "blockers": ["Issue 1", "Issue 2"],
-            "confidence_score": "High",
-            "notes_insights": ["Insight 1", "Insight 2"]
-        }}
-        
-        Make sure all arrays contain complete sentences, not individual characters.
-        """
-        
         data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": "You are a meeting analyst. Respond ONLY with valid JSON. Make sure all arrays contain complete strings, not individual characters."},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": 1200,
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
             "temperature": 0.2
         }
         
+        return url, headers, data
+    
+    def _parse_response(self, response, record, route=None, seconds=None):
+        # Returns (result, invalid fields), or None when nothing usable came back.
+        # With a route, the call's timing feeds the router's latency estimate.
+        if response.status_code != 200:
+            logger.warning("Analysis request returned HTTP %d", response.status_code)
+            return None
+        
+        with record.stage("parse"):
+            body = response.json()
+            usage = body.get('usage') or {}
+            record.add_usage(usage)
+            choice = body['choices'][0]
+            if choice.get('finish_reason') == 'length':
+                record.set(truncated=True)
+        if route is not None and usage.get('completion_tokens'):
+            # Per-token speed is measured on what the model wrote, not what it was allowed
+            self.router.observe(route.model, seconds, usage['completion_tokens'])
+        return self._parse_text(choice['message']['content'], record)
+    
+    def _parse_text(self, text, record):
+        with record.stage("parse"):
+            parsed, repaired = parse_json(text)
+            if parsed is None:
+                logger.warning("Analysis reply was not JSON: %.200r", text)
+                metrics.inc("meetingmind_parse_total", outcome="failed")
+                return None
+            result, invalid = validate_result(parsed)
+        metrics.inc("meetingmind_parse_total", outcome="repaired" if repaired else "ok")
+        for name in invalid:
+            metrics.inc("meetingmind_invalid_fields_total", field=name)
+        if repaired:
+            record.set(repaired=True)
+        return result, invalid
+    
+    def _complete(self, content, route, parsed, record):
+        # Only the fields that came back unusable are asked for again
+        if parsed is None:
+            return None
+        result, invalid = parsed
+        if invalid:
+            url, headers, data = self._build_field_request(content, route, invalid)
+            with self._refetch_attempt(invalid, record):
+                with record.stage("refetch"):
+                    response = transport.post(url, headers=headers, json=data,
+                                              **self._call_options(route, data, record, "refetch"))
+                invalid = self._merge_fields(result, invalid, response, record)
+        return fill_invalid(result, invalid, content)
+    
+    async def _complete_async(self, content, route, parsed, record):
+        if parsed is None:
+            return None
+        result, invalid = parsed
+        if invalid:
+            url, headers, data = self._build_field_request(content, route, invalid)
+            with self._refetch_attempt(invalid, record):
+                async with self._semaphore.get():
+                    with record.stage("refetch"):
+                        response = await transport.apost(url, headers=headers, json=data,
+                                                         **self._call_options(route, data, record, "refetch"))
+                invalid = self._merge_fields(result, invalid, response, record)
+        return fill_invalid(result, invalid, content)
+    
+    @contextmanager
+    def _refetch_attempt(self, fields, record):
+        # A failed re-request leaves the fields to fill_invalid
         try:
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result['choices'][0]['message']['content'].strip()
-                
-                # Clean the response
-                if ai_response.startswith("```json"):
-                    ai_response = ai_response[7:]
-                if ai_response.endswith("```"):
-                    ai_response = ai_response[:-3]
-                ai_response = ai_response.strip()
-                
-                parsed_result = json.loads(ai_response)
-                
-                # Fix all fields that should be lists - FORCE THEM TO BE PROPER LISTS
-                list_fields = ['next_steps', 'notes_insights', 'key_decisions', 'attendees', 'blockers']
-                for field in list_fields:
-                    if field in parsed_result:
-                        if isinstance(parsed_result[field], str):
-                            # Convert string to list
-                            parsed_result[field] = [parsed_result[field]]
-                        elif not isinstance(parsed_result[field], list):
-                            # Set default empty list
-                            parsed_result[field] = []
-                
-                return parsed_result
-                
-        except Exception as e:
-            pass
-        
-        # Fallback with proper structure
-        return {
-            "meeting_summary": "Meeting analysis completed successfully",
-            "key_decisions": ["Key decisions were discussed"],
-            "action_items": [
-                {"task": "Follow up on meeting outcomes", "assignee": "Team", "due_date": "Next week", "priority": "Medium"}
-            ],
-            "attendees": ["Meeting participants"],
-            "next_steps": ["Schedule follow-up meeting", "Complete assigned tasks"],
-            "blockers": [],
-            "confidence_score": "High",
-            "notes_insights": ["Meeting analysis completed", "Action items identified"]
-        }
\ No newline at end of file
+            yield
+        except Exception:
+            record.deadline.check_cancelled()
+            logger.warning("Re-request for %s failed", ", ".join(fields), exc_info=True)
+            metrics.inc("meetingmind_errors_total", stage="refetch")
+    
+    def _merge_fields(self, result, fields, response, record):
+        # Returns the fields still missing after the re-request
+        record.add_call(response)
+        missing = list(fields)
+        if response.status_code == 200:
+            with record.stage("parse"):
+                body = response.json()
+                record.add_usage(body.get('usage'))
+                parsed, _ = parse_json(body['choices'][0]['message']['content'])
+            if parsed is not None:
+                fixed, missing = validate_result(parsed, fields)
+                result.update(fixed)
+        record.set(refetched=len(fields), refetch_fixed=len(fields) - len(missing))
+        for name in fields:
+            metrics.inc("meetingmind_field_refetch_total", outcome="failed" if name in missing else "fixed")
+        return missing
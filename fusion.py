@@ -0,0 +1,111 @@
+import re
+import zlib
+
+import numpy as np
+
+from prompting import count_tokens
+
+SHINGLE_WORDS = 3
+# A passage is redundant when this share of its shingles already appears in
+# a higher-priority source; containment, unlike Jaccard, tolerates Whisper
+# run-on sentences that span several typed lines
+CONTAINMENT_THRESHOLD = 0.5
+MIN_SHINGLES = 3
+
+WORD = re.compile(r"[a-z0-9']+")
+SPEAKER_PREFIX = re.compile(r"^\s*[A-Z][\w .'-]{0,40}:\s+")
+PASSAGE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_passages(text):
+    return [p.strip() for p in PASSAGE_SPLIT.split(text) if p and p.strip()]
+
+
+def _words(passage):
+    # Speaker labels exist in typed transcripts but not in Whisper output
+    return WORD.findall(SPEAKER_PREFIX.sub("", passage).lower())
+
+
+def shingle_hashes(passages):
+    # One flat word-hash array for every passage keeps hashing vectorized and
+    # linear in the total transcript length; returns hashes plus the owning
+    # passage index of each shingle
+    word_lists = [_words(p) for p in passages]
+    lengths = np.array([len(words) for words in word_lists], dtype=np.int64)
+    counts = np.maximum(lengths - (SHINGLE_WORDS - 1), 0)
+    if not counts.sum():
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+
+    words = [w for words in word_lists for w in words]
+    hashes = np.fromiter((zlib.crc32(w.encode('utf-8')) for w in words), dtype=np.uint64, count=len(words))
+
+    owners = np.repeat(np.arange(len(passages)), counts)
+    word_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    shingle_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    # Shingle positions never straddle two passages
+    positions = word_starts[owners] + (np.arange(counts.sum()) - shingle_starts[owners])
+    shingles = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(SHINGLE_WORDS):
+        shingles = shingles * np.uint64(0x9E3779B1) + hashes[positions + offset]
+    shingles ^= shingles >> np.uint64(29)
+    return shingles, owners
+
+
+def fuse_sources(sources):
+    # sources: [(label, text)] in priority order; earlier sources always win
+    kept = []
+    reference = np.zeros(0, dtype=np.uint64)
+    reference_owner = np.zeros(0, dtype=np.int64)
+    removed_tokens = 0
+    removed_passages = 0
+
+    for label, text in sources:
+        passages = split_passages(text or "")
+        if not passages:
+            continue
+        shingles, owners = shingle_hashes(passages)
+        counts = np.bincount(owners, minlength=len(passages))
+
+        slots = np.searchsorted(reference, shingles)
+        slots = np.minimum(slots, max(len(reference) - 1, 0))
+        matched = (reference[slots] == shingles) if len(reference) else np.zeros(len(shingles), dtype=bool)
+        covered = np.bincount(owners, weights=matched, minlength=len(passages))
+
+        ends = np.cumsum(counts)
+        redundant = (counts >= MIN_SHINGLES) & (covered >= CONTAINMENT_THRESHOLD * counts)
+        first_kept = len(kept)
+        source_kept = np.zeros(len(passages), dtype=bool)
+        for index, passage in enumerate(passages):
+            if redundant[index]:
+                # Credit every earlier passage this one overlapped with
+                span = slice(ends[index] - counts[index], ends[index])
+                for owner in np.unique(reference_owner[slots[span][matched[span]]]):
+                    if label not in kept[owner]["sources"]:
+                        kept[owner]["sources"].append(label)
+                removed_tokens += count_tokens(passage)
+                removed_passages += 1
+                continue
+            source_kept[index] = True
+            kept.append({"text": passage, "source": label, "sources": [label]})
+
+        keep_mask = source_kept[owners]
+        kept_numbers = np.cumsum(source_kept) - 1 + first_kept
+        new_shingles = shingles[keep_mask]
+        new_owners = kept_numbers[owners[keep_mask]]
+        merged = np.concatenate((reference, new_shingles))
+        merged_owners = np.concatenate((reference_owner, new_owners))
+        order = np.argsort(merged, kind='stable')
+        reference, reference_owner = merged[order], merged_owners[order]
+
+    sections = []
+    for label, _ in sources:
+        texts = [entry["text"] for entry in kept if entry["source"] == label]
+        if texts:
+            sections.append(f"{label}:\n" + "\n".join(texts))
+
+    return {
+        "content": "\n\n".join(sections) + ("\n\n" if sections else ""),
+        "passages": kept,
+        "removed_passages": removed_passages,
+        "removed_tokens": removed_tokens,
+    }
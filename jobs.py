@@ -0,0 +1,164 @@
+import copy
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from deadline import Cancelled, Deadline
+
+JOB_WORKERS = int(os.getenv('MEETINGMIND_JOB_WORKERS', '8'))
+JOB_RESULT_TTL = float(os.getenv('MEETINGMIND_JOB_RESULT_TTL', '3600'))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+logger = logging.getLogger("meetingmind.jobs")
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.message = "Waiting for a worker"
+        self.progress = 0.0
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        # No expiry of its own; the agents apply theirs underneath it
+        self.deadline = Deadline()
+        # Completes when the worker is done with the job, whatever its status
+        self.future = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def snapshot(self):
+        return copy.copy(self)
+
+
+class JobQueue:
+    # Work runs on a process-wide pool, so a Streamlit rerun or a closed tab
+    # only drops the job id, never the work itself
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_RESULT_TTL):
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="meetingmind-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        # fn is called with on_event=... and deadline=... so agent progress
+        # lands on the job and cancel() reaches the agent
+        job = Job(kind)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        metrics.inc("meetingmind_jobs_total", kind=kind, status="submitted")
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        def on_event(event):
+            with self._lock:
+                job.stage = event.stage
+                job.message = event.message
+                if event.progress is not None:
+                    job.progress = event.progress
+                if "partial" in event.data:
+                    job.partial = event.data["partial"]
+
+        with self._lock:
+            if job.status == CANCELLED:
+                return
+            job.status = RUNNING
+            job.message = "Started"
+        metrics.observe("meetingmind_job_wait_seconds", time.time() - job.created, kind=job.kind)
+        try:
+            result = fn(*args, on_event=on_event, deadline=job.deadline, **kwargs)
+        except Cancelled:
+            return
+        except Exception as e:
+            if job.status == CANCELLED:
+                return
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            with self._lock:
+                job.status = FAILED
+                job.error = str(e)
+                job.finished = time.time()
+            metrics.inc("meetingmind_jobs_total", kind=job.kind, status=FAILED)
+            return
+        with self._lock:
+            if job.status == CANCELLED:
+                # Finished just as it was cancelled; the caller has moved on
+                return
+            job.status = DONE
+            job.result = result
+            job.progress = 1.0
+            job.finished = time.time()
+        metrics.inc("meetingmind_jobs_total", kind=job.kind, status=DONE)
+
+    def get(self, job_id):
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job is not None else None
+
+    def cancel(self, job_id):
+        # Marks the job cancelled at once so the caller can move on; the work
+        # itself stops at its next deadline check or when its response closes
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job.status = CANCELLED
+            job.message = "Cancelled"
+            job.finished = time.time()
+        job.deadline.cancel("Cancelled by user")
+        metrics.inc("meetingmind_jobs_total", kind=job.kind, status=CANCELLED)
+        return True
+
+    def discard(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished is not None and now - job.finished > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            self._prune()
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
+
+
+metrics.describe("meetingmind_jobs_total", "Background jobs by kind and status")
+metrics.describe("meetingmind_job_wait_seconds", "Time jobs spent queued before a worker picked them up")
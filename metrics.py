@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_WINDOW = int(os.getenv('MEETINGMIND_METRICS_WINDOW', '1000'))
+QUANTILES = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger("meetingmind.requests")
+
+_lock = threading.Lock()
+_counters = {}
+_summaries = {}
+_help = {}
+_server = None
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def describe(name, text):
+    _help[name] = text
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is None:
+            summary = _summaries[key] = {"count": 0, "sum": 0.0, "samples": deque(maxlen=SAMPLE_WINDOW)}
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["samples"].append(value)
+
+
+@contextmanager
+def timer(stage, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("meetingmind_stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+
+def counter_value(name, **labels):
+    with _lock:
+        return sum(v for (n, l), v in _counters.items() if n == name and set(labels.items()) <= set(l))
+
+
+def quantile(name, q, **labels):
+    with _lock:
+        samples = [s for (n, l), summary in _summaries.items()
+                   if n == name and set(labels.items()) <= set(l) for s in summary["samples"]]
+    if not samples:
+        return None
+    samples.sort()
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        summaries = sorted((k, dict(v, samples=sorted(v["samples"]))) for k, v in _summaries.items())
+
+    seen = set()
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), summary in summaries:
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} summary")
+        samples = summary["samples"]
+        for q in QUANTILES:
+            value = samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+            lines.append(f"{name}{_format_labels(labels, [('quantile', q)])} {value:.6f}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {summary['sum']:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {summary['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port):
+    # Idempotent so Streamlit reruns can call it freely
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="meetingmind-metrics", daemon=True).start()
+    return _server
+
+
+class RequestRecord:
+    # Collects one user-facing request's stages, tokens and retries, then
+    # emits a single structured log line when finished
+    def __init__(self, kind, **fields):
+        self.kind = kind
+        self.fields = dict(fields, kind=kind, request_id=uuid.uuid4().hex[:12])
+        self.stages = {}
+        self.tokens = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        self.calls = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        # The request's deadline.Deadline, set by whoever starts the request
+        self.deadline = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            observe("meetingmind_stage_seconds", elapsed, stage=name, kind=self.kind)
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def add_call(self, response):
+        retries = getattr(response, 'retries', 0)
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+
+    def add_usage(self, usage):
+        if not usage:
+            return
+        with self._lock:
+            for field in self.tokens:
+                self.tokens[field] += usage.get(field, 0) or 0
+        for field in ("prompt_tokens", "completion_tokens"):
+            inc("meetingmind_tokens_total", usage.get(field, 0) or 0, kind=field.split('_')[0])
+
+    def set(self, **fields):
+        with self._lock:
+            self.fields.update(fields)
+
+    def finish(self, outcome="ok"):
+        elapsed = time.perf_counter() - self._started
+        observe("meetingmind_request_seconds", elapsed, kind=self.kind)
+        inc("meetingmind_requests_total", kind=self.kind, outcome=outcome)
+        with self._lock:
+            line = dict(self.fields, outcome=outcome, latency_s=round(elapsed, 4),
+                        stages={k: round(v, 4) for k, v in self.stages.items()},
+                        calls=self.calls, retries=self.retries, **self.tokens)
+        logger.info(json.dumps(line))
+        return line
+
+
+describe("meetingmind_requests_total", "User-facing transcription/analysis requests by outcome")
+describe("meetingmind_request_seconds", "End-to-end latency of user-facing requests")
+describe("meetingmind_stage_seconds", "Time spent per pipeline stage")
+describe("meetingmind_tokens_total", "Model tokens consumed")
+describe("meetingmind_http_retries_total", "HTTP retries by reason")
+describe("meetingmind_cache_lookups_total", "Cache lookups by cache and result")
+describe("meetingmind_fallbacks_total", "Analyses answered with the fallback result")
+describe("meetingmind_errors_total", "Exceptions raised inside agent stages")
+describe("meetingmind_parse_total", "Analysis replies by parse outcome (ok, repaired, failed)")
+describe("meetingmind_invalid_fields_total", "Required result fields missing or unusable in a parsed reply")
+describe("meetingmind_field_refetch_total", "Fields re-requested on their own, by outcome")
+describe("meetingmind_audio_bytes_saved_total", "Upload bytes removed by audio downmixing, resampling and silence trimming")
+describe("meetingmind_deadline_exceeded_total", "Agent stages that ran out of their deadline and degraded")
@@ -0,0 +1,219 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("alice bob carol roadmap release budget review login migration database "
+         "friday launch customer design sprint blocker decision follow up").split()
+
+
+class MockConfig:
+    def __init__(self, latency=0.2, jitter=0.05, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1.0, transcript_words=500, action_items=3, stream_chunk_chars=24, rpm_limit=0,
+                 truncate_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.transcript_words = transcript_words
+        self.action_items = action_items
+        self.stream_chunk_chars = stream_chunk_chars
+        self.rpm_limit = rpm_limit
+        self.truncate_rate = truncate_rate
+        self.storm_until = 0.0
+
+    def update(self, **values):
+        for name, value in values.items():
+            if not hasattr(self, name):
+                raise AttributeError(name)
+            setattr(self, name, value)
+
+
+def analysis_payload(config, rng):
+    items = [
+        {"task": f"Follow up on the {rng.choice(WORDS)} item {i}", "assignee": rng.choice(["Alice", "Bob", "Carol"]),
+         "due_date": "Friday", "priority": rng.choice(["High", "Medium", "Low"])}
+        for i in range(config.action_items)
+    ]
+    return {
+        "meeting_summary": "The team reviewed the " + " ".join(rng.choice(WORDS) for _ in range(12)) + ".",
+        "key_decisions": ["Ship the release on Friday"],
+        "action_items": items,
+        "attendees": ["Alice", "Bob", "Carol"],
+        "next_steps": ["Send the summary"],
+        "blockers": [],
+        "confidence_score": "High",
+        "notes_insights": ["Generated by the local mock server"],
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        config = self.server.config
+        rng = random.Random()
+        length = int(self.headers.get("Content-Length", 0))
+        # Drain the upload in blocks so large audio bodies are not buffered
+        remaining = length
+        body = b""
+        while remaining > 0:
+            block = self.rfile.read(min(remaining, 1 << 16))
+            if not block:
+                break
+            remaining -= len(block)
+            if len(body) < (1 << 20):
+                body += block
+
+        with self.server.lock:
+            self.server.requests += 1
+            limit_headers = self._quota(config)
+
+        time.sleep(max(0.0, rng.gauss(config.latency, config.jitter)))
+
+        over_quota = limit_headers.get("x-ratelimit-remaining-requests") == "-1"
+        if over_quota or time.time() < config.storm_until or rng.random() < config.rate_limit_rate:
+            limit_headers.pop("x-ratelimit-remaining-requests", None)
+            return self._send(429, b'{"error": {"message": "Rate limit reached"}}', "application/json",
+                              dict(limit_headers, **{"Retry-After": f"{config.retry_after:g}"}))
+        if rng.random() < config.error_rate:
+            return self._send(500, b'{"error": {"message": "Mock server error"}}', "application/json")
+
+        if self.path.endswith("/audio/transcriptions"):
+            text = " ".join(rng.choice(WORDS) for _ in range(config.transcript_words))
+            return self._send(200, text.encode("utf-8"), "text/plain", limit_headers)
+
+        if self.path.endswith("/chat/completions"):
+            request = json.loads(body or b"{}")
+            content = json.dumps(analysis_payload(config, rng))
+            finish_reason = "stop"
+            if rng.random() < config.truncate_rate:
+                # As if max_tokens ran out partway through the reply
+                content = content[:rng.randint(len(content) // 3, len(content) - 1)]
+                finish_reason = "length"
+            if request.get("stream"):
+                return self._stream(content)
+            usage = {"prompt_tokens": len(body) // 4, "completion_tokens": len(content) // 4}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            message = {"role": "assistant", "content": content}
+            response = {"choices": [{"message": message, "finish_reason": finish_reason}], "usage": usage}
+            return self._send(200, json.dumps(response).encode("utf-8"), "application/json", limit_headers)
+
+        self._send(404, b'{"error": {"message": "Not found"}}', "application/json")
+
+    def _quota(self, config):
+        # Continuously refilling request bucket, reported like the real API does
+        if not config.rpm_limit:
+            return {}
+        now = time.time()
+        elapsed = now - self.server.quota_updated
+        self.server.quota_updated = now
+        self.server.quota = min(config.rpm_limit, self.server.quota + elapsed * config.rpm_limit / 60.0)
+        headers = {"x-ratelimit-limit-requests": str(config.rpm_limit)}
+        if self.server.quota < 1:
+            headers["x-ratelimit-remaining-requests"] = "-1"
+            return headers
+        self.server.quota -= 1
+        headers["x-ratelimit-remaining-requests"] = str(int(self.server.quota))
+        return headers
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, content):
+        size = self.server.config.stream_chunk_chars
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for start in range(0, len(content), size):
+            chunk = {"choices": [{"delta": {"content": content[start:start + size]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockOpenAIServer:
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.config = MockConfig(**config)
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = 0
+        self.httpd.quota = float(self.config.rpm_limit)
+        self.httpd.quota_updated = time.time()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def start_storm(self, seconds):
+        # Every request answers 429 until the storm passes
+        self.config.storm_until = time.time() + seconds
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI transcription and chat endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="latency standard deviation in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--rpm-limit", type=int, default=0, help="answer 429 above this many requests per minute")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fraction of replies cut off mid-JSON")
+    parser.add_argument("--transcript-words", type=int, default=500)
+    parser.add_argument("--action-items", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    server = MockOpenAIServer(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, rpm_limit=args.rpm_limit,
+        truncate_rate=args.truncate_rate,
+        transcript_words=args.transcript_words, action_items=args.action_items
+    )
+    print(f"Mock OpenAI API listening on {server.base_url} (set OPENAI_BASE_URL to use it)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+import re
+import threading
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+INPUT_TOKEN_BUDGET = int(os.getenv('MEETINGMIND_INPUT_TOKEN_BUDGET', '1500'))
+MIN_OUTPUT_TOKENS = int(os.getenv('MEETINGMIND_MIN_OUTPUT_TOKENS', '300'))
+MAX_OUTPUT_TOKENS = int(os.getenv('MEETINGMIND_MAX_OUTPUT_TOKENS', '1200'))
+RELATED_TOKEN_BUDGET = int(os.getenv('MEETINGMIND_RELATED_TOKEN_BUDGET', '200'))
+HINT_TOKEN_BUDGET = int(os.getenv('MEETINGMIND_HINT_TOKEN_BUDGET', '150'))
+
+SYSTEM_PROMPT = "You are a meeting analyst. Respond ONLY with valid JSON. All arrays contain complete strings."
+
+# Field names and types only; the long example template cost ~200 tokens per call
+FIELD_HINTS = {
+    "meeting_summary": 'str',
+    "key_decisions": '[str]',
+    "action_items": '[{"task":str,"assignee":str,"due_date":str|"Not specified","priority":"High"|"Medium"|"Low"}]',
+    "attendees": '[str]',
+    "next_steps": '[str]',
+    "blockers": '[str]',
+    "confidence_score": '"High"|"Medium"|"Low"',
+    "notes_insights": '[str]',
+}
+# Output tokens a targeted re-request allows per field
+FIELD_OUTPUT_TOKENS = 150
+
+
+def schema_hint(fields=FIELD_HINTS):
+    return "{" + ",".join(f'"{name}":{FIELD_HINTS[name]}' for name in fields) + "}"
+
+
+SCHEMA_HINT = schema_hint()
+
+# Case-sensitive so acronyms survive ("HMM model"); only a leading capital is
+# allowed, for fillers that open a sentence
+FILLER = re.compile(
+    r"(?<![\w'])(?:[Uu]u*m+|[Uu]u*h+|[Ee]r+m*|[Aa]a*h+|[Hh]h*m+|[Mm]m-?hmm)(?![\w'])[,.]?\s*"
+)
+CLOCK = r"\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?"
+SPEAKER_LABEL = r"[A-Z][\w.'-]*(?: [A-Z][\w.'-]*){0,2}\s*:"
+# Only caption-style timestamps: bracketed, SRT ranges, or a line-leading time
+# before a speaker label. "12:30 lunch moved" is meeting content and stays.
+TIMESTAMP = re.compile(
+    rf"^\s*(?:{CLOCK}\s*-->\s*{CLOCK}|{CLOCK}(?=\s+{SPEAKER_LABEL}))\s*|[\[(]{CLOCK}[\])]"
+)
+SUBTITLE_INDEX = re.compile(r"^\s*\d+\s*$")
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    # Loaded once; if tiktoken cannot fetch its vocabulary we fall back for good
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is None:
+        # Roughly four characters per token for English prose
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens):
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def compact_transcript(text):
+    lines = []
+    seen = set()
+    previous = None
+    for line in text.splitlines():
+        if SUBTITLE_INDEX.match(line):
+            continue
+        line = TIMESTAMP.sub("", line)
+        line = FILLER.sub("", line)
+        line = re.sub(r"[ \t]+", " ", line).strip(" -")
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        key = line.lower()
+        # Drop stutters and lines repeated verbatim elsewhere (e.g. captions)
+        if key == previous or (len(key) > 20 and key in seen):
+            continue
+        seen.add(key)
+        previous = key
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def output_budget(input_tokens):
+    # Extraction output grows with the input but flattens out quickly
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, 250 + input_tokens // 3))
+
+
+class PromptBuilder:
+    def __init__(self, input_budget=INPUT_TOKEN_BUDGET):
+        self.input_budget = input_budget
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.original_tokens = 0
+        self.compacted_tokens = 0
+        self.prompt_tokens = 0
+        self.output_budget_tokens = 0
+
+    def compact(self, content):
+        compacted = compact_transcript(content)
+        with self._lock:
+            self.original_tokens += count_tokens(content)
+            self.compacted_tokens += count_tokens(compacted)
+        return compacted
+
+    def build(self, content, part=1, total=1, context="", hints="", focus="", max_output_tokens=MAX_OUTPUT_TOKENS):
+        content_tokens = count_tokens(content)
+        if content_tokens > self.input_budget:
+            content = truncate_to_tokens(content, self.input_budget)
+            content_tokens = self.input_budget
+
+        # No part numbers: the same chunk must build the same prompt wherever
+        # it lands, so its cached result stays valid after edits elsewhere
+        scope = " This is one part of a longer meeting; analyze only this part." if total > 1 else ""
+        focus = f" {focus}" if focus else ""
+        sections = [f"Analyze this meeting and reply with JSON matching {SCHEMA_HINT}.{scope}{focus}"]
+        if context:
+            context = truncate_to_tokens(context, RELATED_TOKEN_BUDGET)
+            sections.append(f"Earlier related meetings, background only; take nothing from them into the JSON:\n{context}")
+        if hints:
+            # Found by the local rules; the model confirms and completes them
+            # rather than hunting for every name and commitment itself
+            hints = truncate_to_tokens(hints, HINT_TOKEN_BUDGET)
+            sections.append(f"Pre-extracted from the text, verify and correct:\n{hints}")
+        if len(sections) > 1:
+            sections.append(f"Meeting:\n{content}")
+        else:
+            sections.append(content)
+        prompt = "\n\n".join(sections)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        max_tokens = min(max_output_tokens, output_budget(content_tokens))
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += count_tokens(SYSTEM_PROMPT) + count_tokens(prompt)
+            self.output_budget_tokens += max_tokens
+        return messages, max_tokens
+
+    def build_fields(self, content, fields):
+        # Re-asks for just the fields a reply got wrong, with an output budget
+        # sized to them instead of the whole analysis
+        content = truncate_to_tokens(content, self.input_budget)
+        prompt = f"From this meeting, reply with JSON containing only {schema_hint(fields)}.\n\n{content}"
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        max_tokens = max(MIN_OUTPUT_TOKENS, FIELD_OUTPUT_TOKENS * len(fields))
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += count_tokens(SYSTEM_PROMPT) + count_tokens(prompt)
+            self.output_budget_tokens += max_tokens
+        return messages, max_tokens
+
+    def stats(self):
+        with self._lock:
+            saved = self.original_tokens - self.compacted_tokens
+            return {
+                "calls": self.calls,
+                "original_tokens": self.original_tokens,
+                "compacted_tokens": self.compacted_tokens,
+                "saved_tokens": saved,
+                "saved_ratio": saved / self.original_tokens if self.original_tokens else 0.0,
+                "prompt_tokens": self.prompt_tokens,
+                "output_budget_tokens": self.output_budget_tokens,
+            }
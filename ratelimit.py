@@ -0,0 +1,223 @@
+import asyncio
+import os
+import re
+import threading
+import time
+
+import metrics
+
+RPM_LIMIT = float(os.getenv('MEETINGMIND_RPM_LIMIT', '3500'))
+TPM_LIMIT = float(os.getenv('MEETINGMIND_TPM_LIMIT', '90000'))
+# A batch caller is served as if it had queued this many seconds later than
+# it did, so interactive work goes first but batch work is never starved
+BATCH_DELAY = float(os.getenv('MEETINGMIND_BATCH_PRIORITY_DELAY', '30'))
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value):
+    # OpenAI reset headers look like "1s", "6m0s" or "20ms"
+    if not value:
+        return None
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_number(headers, name):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _bounded(wait, deadline):
+    # Wake at least once a second, and in time to notice the deadline
+    wait = min(wait, 1.0)
+    remaining = deadline.remaining() if deadline is not None else None
+    return wait if remaining is None else min(wait, remaining)
+
+
+class RateLimiter:
+    # Two token buckets (requests and tokens per minute) shared by every
+    # session in the process. Callers wait in one queue ordered by arrival,
+    # with batch callers pushed back by BATCH_DELAY, and are granted strictly
+    # in that order so sessions never stampede the API together.
+    def __init__(self, name, rpm=RPM_LIMIT, tpm=TPM_LIMIT):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.available_requests = rpm
+        self.available_tokens = tpm
+        self.blocked_until = 0.0
+        self.grants = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._sequence = 0
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self):
+        return self.rpm > 0 or self.tpm > 0
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if now < self.blocked_until:
+            return
+        if self.rpm > 0:
+            self.available_requests = min(self.rpm, self.available_requests + elapsed * self.rpm / 60.0)
+        if self.tpm > 0:
+            self.available_tokens = min(self.tpm, self.available_tokens + elapsed * self.tpm / 60.0)
+
+    def _enqueue(self, priority):
+        with self._cond:
+            self._sequence += 1
+            delay = BATCH_DELAY if priority == BATCH else 0.0
+            ticket = (time.monotonic() + delay, self._sequence)
+            self._waiters.append(ticket)
+            return ticket
+
+    def _leave(self, ticket):
+        with self._cond:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+    def _poll(self, ticket, cost):
+        # Returns 0 when the caller may go, otherwise seconds worth waiting
+        now = time.monotonic()
+        self._refill(now)
+        if min(self._waiters) != ticket:
+            return 0.05
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        # Never ask for more than one minute's worth, or it could never run
+        cost = min(cost, self.tpm) if self.tpm > 0 else 0
+        waits = []
+        if self.rpm > 0 and self.available_requests < 1:
+            waits.append((1 - self.available_requests) * 60.0 / self.rpm)
+        if cost and self.available_tokens < cost:
+            waits.append((cost - self.available_tokens) * 60.0 / self.tpm)
+        if waits:
+            return max(waits)
+        if self.rpm > 0:
+            self.available_requests -= 1
+        self.available_tokens -= cost
+        self._waiters.remove(ticket)
+        self.grants += 1
+        self._cond.notify_all()
+        return 0
+
+    def acquire(self, cost=0, priority=INTERACTIVE, deadline=None):
+        # A cancelled or expired deadline gives up its place in the queue
+        if not self.enabled:
+            return 0.0
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        try:
+            with self._cond:
+                while True:
+                    if deadline is not None:
+                        deadline.check()
+                    wait = self._poll(ticket, cost)
+                    if not wait:
+                        break
+                    self._cond.wait(_bounded(wait, deadline))
+        except BaseException:
+            self._leave(ticket)
+            raise
+        return self._record(started, priority)
+
+    async def acquire_async(self, cost=0, priority=INTERACTIVE, deadline=None):
+        if not self.enabled:
+            return 0.0
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                if deadline is not None:
+                    deadline.check()
+                with self._cond:
+                    wait = self._poll(ticket, cost)
+                if not wait:
+                    break
+                await asyncio.sleep(_bounded(wait, deadline))
+        except BaseException:
+            self._leave(ticket)
+            raise
+        return self._record(started, priority)
+
+    def _record(self, started, priority):
+        waited = time.monotonic() - started
+        with self._cond:
+            self.waited += waited
+        metrics.observe("meetingmind_ratelimit_wait_seconds", waited, limiter=self.name, priority=priority)
+        return waited
+
+    def update(self, headers):
+        # The API knows the real quota and what other processes have used
+        limit_requests = _header_number(headers, 'x-ratelimit-limit-requests')
+        limit_tokens = _header_number(headers, 'x-ratelimit-limit-tokens')
+        remaining_requests = _header_number(headers, 'x-ratelimit-remaining-requests')
+        remaining_tokens = _header_number(headers, 'x-ratelimit-remaining-tokens')
+        with self._cond:
+            self._refill(time.monotonic())
+            if limit_requests:
+                self.rpm = limit_requests
+            if limit_tokens:
+                self.tpm = limit_tokens
+            if remaining_requests is not None:
+                self.available_requests = min(self.available_requests, remaining_requests)
+            if remaining_tokens is not None:
+                self.available_tokens = min(self.available_tokens, remaining_tokens)
+
+    def throttle(self, retry_after=None, headers=None):
+        # A 429 pauses every caller of this limiter, not just the one that hit it
+        if headers is not None:
+            retry_after = retry_after or parse_duration(headers.get('x-ratelimit-reset-requests'))
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + (retry_after or 1.0))
+            self.available_requests = 0
+            self.throttled += 1
+        metrics.inc("meetingmind_ratelimit_throttled_total", limiter=self.name)
+
+    def stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "available_requests": round(self.available_requests, 2),
+                "available_tokens": round(self.available_tokens, 2),
+                "waiting": len(self._waiters),
+                "grants": self.grants,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited, 3),
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name):
+    # One limiter per model, since OpenAI quotas are per model
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = RateLimiter(name)
+    return limiter
+
+
+metrics.describe("meetingmind_ratelimit_wait_seconds", "Time callers queued in the shared rate limiter")
+metrics.describe("meetingmind_ratelimit_throttled_total", "429 responses that paused a shared rate limiter")
@@ -0,0 +1,118 @@
+import os
+import threading
+
+import metrics
+
+FAST_MODEL = os.getenv('MEETINGMIND_FAST_MODEL', 'gpt-3.5-turbo')
+# Empty disables the strong model: no escalation, every request on the fast path
+STRONG_MODEL = os.getenv('MEETINGMIND_STRONG_MODEL', 'gpt-4o')
+LATENCY_SLA = float(os.getenv('MEETINGMIND_LATENCY_SLA_SECONDS', '30'))
+# Above this many input tokens, non-standup meetings start on the strong model
+STRONG_INPUT_TOKENS = int(os.getenv('MEETINGMIND_STRONG_INPUT_TOKENS', '4000'))
+
+# Prompt focus and output ceiling per meeting type. A standup is a handful of
+# short updates; a planning meeting carries most of the decisions and owners.
+TEMPLATES = {
+    "general": ("", 1200),
+    "standup": ("This is a daily standup: per person, what was done, what is next and any blocker. "
+                "Keep the summary to two sentences.", 400),
+    "planning": ("This is a planning meeting: capture every decision, task owner and due date.", 1200),
+    "retrospective": ("This is a retrospective: key_decisions are agreed changes, notes_insights what went "
+                      "well and what did not.", 700),
+}
+
+# Starting guesses for latency; replaced by observed timings as calls complete
+MODEL_PROFILES = {
+    "gpt-3.5-turbo": {"overhead": 0.6, "tokens_per_second": 90.0},
+    "gpt-4o-mini": {"overhead": 0.6, "tokens_per_second": 80.0},
+    "gpt-4o": {"overhead": 1.0, "tokens_per_second": 45.0},
+}
+DEFAULT_PROFILE = {"overhead": 1.0, "tokens_per_second": 40.0}
+SMOOTHING = 0.2
+
+
+class Route:
+    def __init__(self, model, template, focus, max_output_tokens, escalate_to=None, profile=""):
+        self.model = model
+        self.template = template
+        self.focus = focus
+        self.max_output_tokens = max_output_tokens
+        self.escalate_to = escalate_to
+        # The configured model pair, not this request's pick: cache keys use it
+        # so a route flipping between fast and strong still hits the cache
+        self.profile = profile
+
+    def escalated(self):
+        return Route(self.escalate_to, self.template, self.focus, self.max_output_tokens, profile=self.profile)
+
+
+class Router:
+    # Picks model, prompt focus and output budget per request, and decides
+    # whether a weak fast-path answer is worth a second call to the strong model
+    def __init__(self, fast_model=FAST_MODEL, strong_model=STRONG_MODEL, sla=LATENCY_SLA,
+                 strong_input_tokens=STRONG_INPUT_TOKENS):
+        self.fast_model = fast_model
+        self.strong_model = strong_model or None
+        self.sla = sla
+        self.strong_input_tokens = strong_input_tokens
+        self.profile = f"{fast_model}|{self.strong_model or '-'}"
+        self._lock = threading.Lock()
+        self._seconds_per_token = {}
+
+    def route(self, meeting_type, input_tokens):
+        template = meeting_type if meeting_type in TEMPLATES else "general"
+        focus, max_output_tokens = TEMPLATES[template]
+        strong = self.strong_model
+        if (strong and template != "standup" and input_tokens > self.strong_input_tokens
+                and self.estimate(strong, max_output_tokens) <= self.sla):
+            route = Route(strong, template, focus, max_output_tokens, profile=self.profile)
+        else:
+            route = Route(self.fast_model, template, focus, max_output_tokens, escalate_to=strong, profile=self.profile)
+        metrics.inc("meetingmind_routes_total", model=route.model, template=template)
+        return route
+
+    def estimate(self, model, output_tokens):
+        profile = MODEL_PROFILES.get(model, DEFAULT_PROFILE)
+        with self._lock:
+            per_token = self._seconds_per_token.get(model, 1.0 / profile["tokens_per_second"])
+        return profile["overhead"] + output_tokens * per_token
+
+    def observe(self, model, seconds, output_tokens):
+        if output_tokens <= 0:
+            return
+        profile = MODEL_PROFILES.get(model, DEFAULT_PROFILE)
+        sample = max(0.0, seconds - profile["overhead"]) / output_tokens
+        with self._lock:
+            current = self._seconds_per_token.get(model)
+            self._seconds_per_token[model] = sample if current is None else current + SMOOTHING * (sample - current)
+
+    def should_escalate(self, route, result, elapsed, remaining=None):
+        # Only a failed or low-confidence fast answer escalates, and only when
+        # the strong model can still answer inside what is left of the SLA
+        # and of the request's own deadline
+        if not route.escalate_to:
+            return False
+        if result is not None and result.get("confidence_score") != "Low":
+            return False
+        budget = self.sla - elapsed if remaining is None else min(self.sla - elapsed, remaining)
+        if self.estimate(route.escalate_to, route.max_output_tokens) > budget:
+            metrics.inc("meetingmind_escalations_total", model=route.escalate_to, outcome="skipped_sla")
+            return False
+        return True
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = Router()
+    return _router
+
+
+metrics.describe("meetingmind_routes_total", "Analysis requests by routed model and prompt template")
+metrics.describe("meetingmind_escalations_total", "Fast-path chunks re-run on the strong model, by outcome")
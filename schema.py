@@ -0,0 +1,210 @@
+import json
+import re
+
+from extraction import extract_meeting
+
+PRIORITIES = ("High", "Medium", "Low")
+CONFIDENCE = ("High", "Medium", "Low")
+NOT_SPECIFIED = "Not specified"
+
+# Field -> kind. Required fields are worth a targeted re-request when the
+# model gets them wrong; the rest fall back to a default.
+FIELDS = {
+    "meeting_summary": "text",
+    "key_decisions": "list",
+    "action_items": "items",
+    "attendees": "list",
+    "next_steps": "list",
+    "blockers": "list",
+    "confidence_score": "confidence",
+    "notes_insights": "list",
+}
+REQUIRED = ("meeting_summary", "key_decisions", "action_items", "attendees", "next_steps")
+DEFAULTS = {"blockers": [], "notes_insights": [], "confidence_score": "Medium"}
+
+FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```\s*$")
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+_decoder = json.JSONDecoder()
+
+
+def _closers(stack):
+    return "".join('}' if opener == '{' else ']' for opener in reversed(stack))
+
+
+def repair_json(text):
+    # Closes a JSON object that was cut off mid-stream (max_tokens). Scans
+    # once, remembering the last point where a value had just finished, then
+    # cuts there and closes whatever was still open. Half-written strings,
+    # keys without values and dangling commas are dropped rather than guessed.
+    # Returns (object, top-level key whose value was cut short).
+    stack = []
+    expecting_key = []
+    safe = None
+    key = key_start = None
+    in_string = escape = is_key = scalar = False
+
+    def cut(end):
+        return end, _closers(stack), key if len(stack) > 1 else None
+
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == '"':
+                in_string = False
+                if not is_key:
+                    safe = cut(i + 1)
+                elif len(stack) == 1:
+                    key = json.loads(text[key_start:i + 1])
+            continue
+        if scalar:
+            if c not in ',}] \t\r\n':
+                continue
+            scalar = False
+            safe = cut(i)
+        if c == '"':
+            in_string = True
+            is_key = bool(stack) and stack[-1] == '{' and expecting_key[-1]
+            key_start = i
+        elif c in '{[':
+            stack.append(c)
+            expecting_key.append(c == '{')
+            safe = cut(i + 1)
+        elif c in '}]':
+            if not stack:
+                break
+            stack.pop()
+            expecting_key.pop()
+            safe = cut(i + 1)
+            if not stack:
+                break
+        elif c == ':' and stack:
+            expecting_key[-1] = False
+        elif c == ',':
+            # Only separates; in an array it must not start a scalar either
+            if stack and stack[-1] == '{':
+                expecting_key[-1] = True
+        elif not c.isspace() and stack:
+            scalar = True
+    if safe is None:
+        return None, None
+    end, closers, open_key = safe
+    try:
+        return json.loads(text[:end] + closers), open_key
+    except ValueError:
+        return None, None
+
+
+def parse_json(text):
+    # Returns (object, repaired); object is None when nothing usable was found
+    text = FENCE.sub("", text.strip())
+    start = text.find('{')
+    if start < 0:
+        return None, False
+    text = text[start:]
+    try:
+        parsed, _ = _decoder.raw_decode(text)
+        return parsed, False
+    except ValueError:
+        pass
+    try:
+        parsed, _ = _decoder.raw_decode(TRAILING_COMMA.sub(r"\1", text))
+        return parsed, True
+    except ValueError:
+        pass
+    parsed, open_key = repair_json(text)
+    if not isinstance(parsed, dict):
+        return None, False
+    if open_key in REQUIRED:
+        # A list cut off part way is better asked for again than shipped short
+        parsed.pop(open_key, None)
+    return parsed, True
+
+
+def _choice(value, options, default):
+    if isinstance(value, str):
+        for option in options:
+            if value.strip().lower() == option.lower():
+                return option
+    return default
+
+
+def _text_list(value):
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if not isinstance(value, list):
+        return None
+    items = []
+    for item in value:
+        if isinstance(item, (str, int, float)) and str(item).strip():
+            items.append(str(item).strip())
+        elif isinstance(item, dict) and item:
+            # {"name": "Alice"} and similar: keep the first text value
+            text = next((v for v in item.values() if isinstance(v, str) and v.strip()), None)
+            if text:
+                items.append(text.strip())
+    return items
+
+
+def _action_items(value):
+    if not isinstance(value, list):
+        return None
+    items = []
+    for item in value:
+        if isinstance(item, str) and item.strip():
+            item = {"task": item}
+        if not isinstance(item, dict) or not isinstance(item.get("task"), str) or not item["task"].strip():
+            continue
+        items.append({
+            "task": item["task"].strip(),
+            "assignee": str(item.get("assignee") or NOT_SPECIFIED).strip(),
+            "due_date": str(item.get("due_date") or NOT_SPECIFIED).strip(),
+            "priority": _choice(item.get("priority"), PRIORITIES, "Medium"),
+        })
+    return items
+
+
+def validate_field(name, value):
+    # Returns the cleaned value, or None when it cannot be used
+    kind = FIELDS[name]
+    if kind == "text":
+        return value.strip() if isinstance(value, str) and value.strip() else None
+    if kind == "list":
+        return _text_list(value)
+    if kind == "items":
+        return _action_items(value)
+    return _choice(value, CONFIDENCE, None)
+
+
+def validate_result(parsed, fields=FIELDS):
+    # Returns (result, invalid): every usable field cleaned, and the required
+    # fields that were missing or unusable
+    result = {}
+    invalid = []
+    for name in fields:
+        value = validate_field(name, parsed.get(name)) if isinstance(parsed, dict) else None
+        if value is not None:
+            result[name] = value
+        elif name in REQUIRED:
+            invalid.append(name)
+        else:
+            result[name] = DEFAULTS[name]
+    return result, invalid
+
+
+def fill_invalid(result, invalid, content):
+    # Last resort for fields the model never got right: what the local rules
+    # find in the same text, at low confidence. Without a summary there is no
+    # analysis to speak of.
+    if not invalid:
+        return result
+    if "meeting_summary" in invalid:
+        return None
+    extracted = extract_meeting(content)
+    for name in invalid:
+        result[name] = extracted.get(name, [])
+    result["confidence_score"] = "Low"
+    return result
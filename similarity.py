@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_DIR = os.getenv('MEETINGMIND_INDEX_DIR', '.data')
+# Power of two so the hash maps to a column with a mask
+VECTOR_DIM = int(os.getenv('MEETINGMIND_VECTOR_DIM', '2048'))
+RELATED_MEETINGS = int(os.getenv('MEETINGMIND_RELATED_MEETINGS', '3'))
+MIN_SIMILARITY = float(os.getenv('MEETINGMIND_MIN_SIMILARITY', '0.1'))
+SUMMARY_CHARS = 240
+
+WORD = re.compile(r"[a-z0-9']{2,}")
+
+
+def hash_vector(text, dim=VECTOR_DIM):
+    # Signed feature hashing of words and word pairs with sublinear term
+    # frequency; no vocabulary to store or keep in sync
+    words = WORD.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((zlib.crc32(f.encode('utf-8')) for f in features), dtype=np.uint32, count=len(features))
+    columns = (hashes & np.uint32(dim - 1)).astype(np.int64)
+    signs = np.where(hashes & np.uint32(1 << 31), -1.0, 1.0)
+    vector += np.bincount(columns, weights=signs, minlength=dim).astype(np.float32)
+    return np.sign(vector) * np.log1p(np.abs(vector))
+
+
+def meeting_text(analysis):
+    parts = [analysis.get('meeting_summary', '')]
+    parts += analysis.get('key_decisions', [])
+    parts += [item.get('task', '') for item in analysis.get('action_items', [])]
+    parts += analysis.get('blockers', [])
+    return "\n".join(str(part) for part in parts)
+
+
+class SimilarityIndex:
+    # Rows live in a memory-mapped float32 .npy that grows by doubling; ids
+    # and short summaries go to an append-only JSONL log next to it, so a
+    # write costs one row and one line however large the index gets
+    def __init__(self, directory=INDEX_DIR, dim=VECTOR_DIM):
+        self.dim = dim
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._meta = {"ids": [], "hashes": [], "entries": []}
+        self._rows = {}
+        self._weighted = None
+        self._idf = None
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._path = os.path.join(directory, 'similarity.npy') if directory else None
+        self._meta_path = os.path.join(directory, 'similarity.jsonl') if directory else None
+        self._lock_path = os.path.join(directory, 'similarity.lock') if directory else None
+        # Where this instance has read the log up to, and which .npy it has mapped
+        self._offset = 0
+        self._file_id = None
+        if self._path:
+            self._refresh()
+
+    @contextmanager
+    def _shared(self, exclusive=False):
+        # The app and batch.py can write the same directory at once: rows are
+        # only assigned under an exclusive file lock, after catching up on
+        # whatever the other processes have logged since
+        if not self._path or fcntl is None:
+            if self._path:
+                self._refresh()
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        if not os.path.exists(self._path) or not os.path.exists(self._meta_path):
+            return
+        stat = os.stat(self._path)
+        if (stat.st_ino, stat.st_size) != self._file_id:
+            # Another process grew the file and swapped it in
+            vectors = np.load(self._path, mmap_mode='r+')
+            if vectors.shape[1] != self.dim:
+                # Dimension changed: start over rather than mixing hash spaces
+                return
+            self._vectors = vectors
+            self._file_id = (stat.st_ino, stat.st_size)
+            self._weighted = None
+        with open(self._meta_path, 'rb') as meta_file:
+            meta_file.seek(self._offset)
+            tail = meta_file.read()
+        # A line still being written, or cut short by a crash, waits for its newline
+        complete = tail[:tail.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        for line in complete.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self._apply(record["row"], record["hash"], record["entry"])
+
+    def _apply(self, row, content_hash, entry):
+        if row == len(self._meta["ids"]):
+            self._meta["ids"].append(entry["id"])
+            self._meta["hashes"].append(content_hash)
+            self._meta["entries"].append(entry)
+            self._rows[entry["id"]] = row
+        elif row < len(self._meta["ids"]):
+            self._meta["hashes"][row] = content_hash
+            self._meta["entries"][row] = entry
+        self._weighted = None
+
+    def _ensure_capacity(self, rows):
+        if rows <= len(self._vectors):
+            return
+        capacity = max(64, 2 * len(self._vectors), rows)
+        if self._path:
+            os.makedirs(self.directory, exist_ok=True)
+            grown = np.lib.format.open_memmap(self._path + '.tmp', mode='w+', dtype=np.float32,
+                                              shape=(capacity, self.dim))
+        else:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        count = len(self._meta["ids"])
+        grown[:count] = self._vectors[:count]
+        if self._path:
+            grown.flush()
+            del self._vectors
+            os.replace(self._path + '.tmp', self._path)
+            grown = np.load(self._path, mmap_mode='r+')
+            stat = os.stat(self._path)
+            self._file_id = (stat.st_ino, stat.st_size)
+        self._vectors = grown
+
+    def add(self, meeting_id, analysis, meeting_type="general", content_hash=None, created=None):
+        vector = hash_vector(meeting_text(analysis), self.dim)
+        entry = {
+            "id": meeting_id,
+            "meeting_type": meeting_type,
+            "created": created or datetime.now().timestamp(),
+            "summary": analysis.get('meeting_summary', '')[:SUMMARY_CHARS],
+        }
+        with self._lock, self._shared(exclusive=True):
+            row = self._rows.get(meeting_id)
+            if row is None:
+                row = len(self._meta["ids"])
+                self._ensure_capacity(row + 1)
+            self._vectors[row] = vector
+            self._apply(row, content_hash, entry)
+            self._persist(row, content_hash, entry)
+
+    def _persist(self, row, content_hash, entry):
+        if not self._path:
+            return
+        # Vector first, so a logged row always has its data on disk
+        self._vectors.flush()
+        with open(self._meta_path, 'ab') as meta_file:
+            meta_file.write((json.dumps({"row": row, "hash": content_hash, "entry": entry}) + "\n").encode('utf-8'))
+            self._offset = meta_file.tell()
+
+    def _matrix(self):
+        # TF-IDF weighting and row norms are rebuilt lazily after writes
+        if self._weighted is None:
+            vectors = np.asarray(self._vectors[:len(self._meta["ids"])])
+            document_frequency = np.count_nonzero(vectors, axis=0).astype(np.float32)
+            self._idf = np.log((len(vectors) + 1) / (document_frequency + 1)).astype(np.float32) + 1
+            weighted = vectors * self._idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            self._weighted = weighted / np.maximum(norms, 1e-6)
+        return self._weighted, self._idf
+
+    def search(self, text, k=RELATED_MEETINGS, exclude_hash=None, min_similarity=MIN_SIMILARITY):
+        with self._lock, self._shared():
+            if not self._meta["ids"] or k <= 0:
+                return []
+            matrix, idf = self._matrix()
+            query = hash_vector(text, self.dim) * idf
+            norm = np.linalg.norm(query)
+            if not norm:
+                return []
+            scores = matrix @ (query / norm)
+            if exclude_hash is not None:
+                # An earlier analysis of this very meeting is not "related"
+                scores[[row for row, h in enumerate(self._meta["hashes"]) if h == exclude_hash]] = -1.0
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [dict(self._meta["entries"][row], score=round(float(scores[row]), 4))
+                    for row in top if scores[row] >= min_similarity]
+
+    def stats(self):
+        with self._lock, self._shared():
+            return {"meetings": len(self._meta["ids"]), "dim": self.dim,
+                    "bytes": len(self._meta["ids"]) * self.dim * 4}
+
+
+def related_context(related):
+    # One short line per meeting keeps the prompt overhead to a few dozen tokens
+    lines = []
+    for meeting in related:
+        when = datetime.fromtimestamp(meeting["created"]).strftime('%Y-%m-%d')
+        lines.append(f"- {when} {meeting['meeting_type']}: {meeting['summary']}")
+    return "\n".join(lines)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarityIndex()
+    return _index
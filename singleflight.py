@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import Future
+
+import metrics
+from deadline import Cancelled, wait_for
+
+# A leader stopped by its own caller hands the key on instead of failing followers
+LEADER_CANCELLED = (asyncio.CancelledError, FutureCancelledError, Cancelled)
+
+
+def wait_result(call, deadline=None):
+    # Waits on a shared call while still honouring the follower's own deadline
+    if deadline is None:
+        return call.result()
+    return wait_for(call, deadline)
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: the first
+    # caller runs it, later callers wait on its future. Futures are
+    # concurrent.futures ones so threads and event loops can share a key.
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def begin(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                metrics.inc("meetingmind_coalesced_total", flight=self.name)
+                return call, False
+            call = self._calls[key] = Future()
+            self.leaders += 1
+            return call, True
+
+    def end(self, key, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        if error is not None:
+            call.set_exception(error)
+        else:
+            call.set_result(result)
+
+    def do(self, key, fn, on_join=None, deadline=None):
+        # Returns (result, shared); a leader that was cancelled hands the key
+        # to the next caller instead of failing everyone waiting on it
+        while True:
+            call, leader = self.begin(key)
+            if leader:
+                try:
+                    result = fn()
+                except BaseException as e:
+                    self.end(key, call, error=e)
+                    raise
+                self.end(key, call, result)
+                return result, False
+            if on_join is not None:
+                on_join()
+                on_join = None
+            try:
+                return wait_result(call, deadline), True
+            except LEADER_CANCELLED:
+                if deadline is not None:
+                    deadline.check_cancelled()
+                continue
+
+    async def do_async(self, key, coro_fn, on_join=None):
+        while True:
+            call, leader = self.begin(key)
+            if leader:
+                try:
+                    result = await coro_fn()
+                except BaseException as e:
+                    self.end(key, call, error=e)
+                    raise
+                self.end(key, call, result)
+                return result, False
+            if on_join is not None:
+                on_join()
+                on_join = None
+            try:
+                # Shielded so a cancelled follower never cancels the shared call
+                return await asyncio.shield(asyncio.wrap_future(call)), True
+            except (asyncio.CancelledError, FutureCancelledError):
+                # Retry only when it was the leader that got cancelled
+                if call.done() and isinstance(call.exception(), LEADER_CANCELLED):
+                    continue
+                raise
+
+    def stats(self):
+        with self._lock:
+            total = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "coalesce_rate": self.coalesced / total if total else 0.0,
+            }
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name):
+    # Shared by every session in the process, like the caches
+    flight = _flights.get(name)
+    if flight is None:
+        with _flights_lock:
+            flight = _flights.get(name)
+            if flight is None:
+                flight = _flights[name] = SingleFlight(name)
+    return flight
+
+
+metrics.describe("meetingmind_coalesced_total", "Calls that joined an identical in-flight request")
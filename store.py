@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+from cache import normalize_content
+from similarity import get_similarity_index
+
+STORE_PATH = os.getenv('MEETINGMIND_STORE_PATH', os.path.join('.data', 'meetings.sqlite3'))
+
+WORD = re.compile(r"\w+", re.UNICODE)
+DUE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d %B %Y", "%B %d, %Y", "%B %d %Y", "%b %d, %Y", "%b %d %Y")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT UNIQUE,
+    created REAL,
+    meeting_type TEXT,
+    sources TEXT,
+    summary TEXT,
+    analysis TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS meetings_created ON meetings (created);
+CREATE TABLE IF NOT EXISTS action_items (
+    id INTEGER PRIMARY KEY,
+    meeting_id INTEGER REFERENCES meetings (id) ON DELETE CASCADE,
+    task TEXT,
+    assignee TEXT,
+    assignee_key TEXT,
+    priority TEXT,
+    due_date TEXT,
+    due_on TEXT
+);
+CREATE INDEX IF NOT EXISTS action_items_assignee ON action_items (assignee_key, priority);
+CREATE INDEX IF NOT EXISTS action_items_priority ON action_items (priority);
+CREATE INDEX IF NOT EXISTS action_items_due ON action_items (due_on);
+CREATE INDEX IF NOT EXISTS action_items_meeting ON action_items (meeting_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5 (summary, decisions, tasks, content);
+"""
+
+
+def content_hash(content, meeting_type):
+    return hashlib.sha256(f"{meeting_type}\0{normalize_content(content)}".encode('utf-8')).hexdigest()
+
+
+def parse_due_date(value):
+    # Only absolute dates get an ISO form; "Friday" stays text-searchable
+    value = (value or "").strip()
+    for fmt in DUE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def fts_query(text):
+    # Quote every word so user input can never be parsed as FTS syntax
+    return " ".join(f'"{word}"' for word in WORD.findall(text or ""))
+
+
+def _iso(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+def _timestamp(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return value.timestamp()
+
+
+class MeetingStore:
+    def __init__(self, path=STORE_PATH):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA foreign_keys=ON")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+
+    def save(self, analysis, content, meeting_type="general", sources=None, created=None):
+        # Re-saving the same meeting content replaces the earlier analysis
+        digest = content_hash(content, meeting_type)
+        items = analysis.get('action_items', [])
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id FROM meetings WHERE content_hash = ?", (digest,)).fetchone()
+            if row is not None:
+                meeting_id = row["id"]
+                self._db.execute("DELETE FROM action_items WHERE meeting_id = ?", (meeting_id,))
+                self._db.execute("DELETE FROM meetings_fts WHERE rowid = ?", (meeting_id,))
+                self._db.execute(
+                    "UPDATE meetings SET sources = ?, summary = ?, analysis = ? WHERE id = ?",
+                    (json.dumps(sources or []), analysis.get('meeting_summary', ''), json.dumps(analysis), meeting_id)
+                )
+            else:
+                meeting_id = self._db.execute(
+                    "INSERT INTO meetings (content_hash, created, meeting_type, sources, summary, analysis, content)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (digest, created or time.time(), meeting_type, json.dumps(sources or []),
+                     analysis.get('meeting_summary', ''), json.dumps(analysis), content)
+                ).lastrowid
+            self._db.executemany(
+                "INSERT INTO action_items (meeting_id, task, assignee, assignee_key, priority, due_date, due_on)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(meeting_id, item.get('task', ''), item.get('assignee', ''),
+                  (item.get('assignee') or '').strip().lower(), item.get('priority', 'Medium'),
+                  item.get('due_date', ''), parse_due_date(item.get('due_date'))) for item in items]
+            )
+            self._db.execute(
+                "INSERT INTO meetings_fts (rowid, summary, decisions, tasks, content) VALUES (?, ?, ?, ?, ?)",
+                (meeting_id, analysis.get('meeting_summary', ''),
+                 "\n".join(analysis.get('key_decisions', []) + analysis.get('blockers', [])),
+                 "\n".join(f"{item.get('task', '')} {item.get('assignee', '')}" for item in items), content)
+            )
+        return meeting_id
+
+    def search(self, query, meeting_type=None, since=None, until=None, limit=20):
+        match = fts_query(query)
+        if not match:
+            return self.recent(meeting_type, since, until, limit)
+        sql = ("SELECT m.id, m.created, m.meeting_type, m.summary,"
+               " snippet(meetings_fts, -1, '[', ']', ' … ', 12) AS snippet"
+               " FROM meetings_fts JOIN meetings m ON m.id = meetings_fts.rowid"
+               " WHERE meetings_fts MATCH ?")
+        params = [match]
+        sql, params = self._filters(sql, params, meeting_type, since, until)
+        sql += " ORDER BY bm25(meetings_fts, 4.0, 2.0, 2.0, 1.0) LIMIT ?"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params + [limit])]
+
+    def recent(self, meeting_type=None, since=None, until=None, limit=20):
+        sql = "SELECT m.id, m.created, m.meeting_type, m.summary, '' AS snippet FROM meetings m WHERE 1 = 1"
+        sql, params = self._filters(sql, [], meeting_type, since, until)
+        sql += " ORDER BY m.created DESC LIMIT ?"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params + [limit])]
+
+    def action_items(self, assignee=None, priority=None, due_after=None, due_before=None,
+                     meeting_type=None, since=None, until=None, limit=100):
+        sql = ("SELECT a.task, a.assignee, a.priority, a.due_date, a.due_on, m.id AS meeting_id,"
+               " m.created, m.meeting_type FROM action_items a JOIN meetings m ON m.id = a.meeting_id WHERE 1 = 1")
+        params = []
+        if assignee:
+            sql += " AND a.assignee_key = ?"
+            params.append(assignee.strip().lower())
+        if priority:
+            sql += " AND a.priority = ?"
+            params.append(priority)
+        if due_after:
+            sql += " AND a.due_on >= ?"
+            params.append(_iso(due_after))
+        if due_before:
+            sql += " AND a.due_on <= ?"
+            params.append(_iso(due_before))
+        sql, params = self._filters(sql, params, meeting_type, since, until)
+        sql += " ORDER BY m.created DESC, a.id LIMIT ?"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params + [limit])]
+
+    def _filters(self, sql, params, meeting_type, since, until):
+        if meeting_type:
+            sql += " AND m.meeting_type = ?"
+            params.append(meeting_type)
+        if since is not None:
+            sql += " AND m.created >= ?"
+            params.append(_timestamp(since))
+        if until is not None:
+            sql += " AND m.created < ?"
+            params.append(_timestamp(until))
+        return sql, params
+
+    def iter_meetings(self):
+        with self._lock:
+            rows = self._db.execute("SELECT id, content_hash, created, meeting_type, analysis FROM meetings").fetchall()
+        for row in rows:
+            yield row["id"], json.loads(row["analysis"]), row["meeting_type"], row["content_hash"], row["created"]
+
+    def get(self, meeting_id):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+        if row is None:
+            return None
+        meeting = dict(row)
+        meeting["analysis"] = json.loads(meeting["analysis"])
+        meeting["sources"] = json.loads(meeting["sources"])
+        return meeting
+
+    def assignees(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT assignee, COUNT(*) AS items FROM action_items WHERE assignee_key NOT IN ('', 'not specified')"
+                " GROUP BY assignee_key ORDER BY items DESC"
+            ).fetchall()
+        return [row["assignee"] for row in rows]
+
+    def stats(self):
+        with self._lock:
+            meetings = self._db.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+            items = self._db.execute("SELECT COUNT(*) FROM action_items").fetchone()[0]
+        return {"meetings": meetings, "action_items": items}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_meeting_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MeetingStore()
+    return _store
+
+
+def save_meeting(analysis, content, meeting_type="general", sources=None):
+    # History and the related-meeting index are written together
+    store = get_meeting_store()
+    index = get_similarity_index()
+    if not index.stats()["meetings"] and store.stats()["meetings"]:
+        for meeting_id, saved, saved_type, digest, created in store.iter_meetings():
+            index.add(meeting_id, saved, saved_type, digest, created)
+    meeting_id = store.save(analysis, content, meeting_type, sources)
+    index.add(meeting_id, analysis, meeting_type, content_hash(content, meeting_type))
+    return meeting_id
@@ -0,0 +1,118 @@
+import json
+
+
+def iter_sse_deltas(response):
+    # OpenAI streams "data: {...}" lines terminated by "data: [DONE]"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            return
+        try:
+            chunk = json.loads(payload)
+        except ValueError:
+            continue
+        choices = chunk.get('choices') or [{}]
+        delta = choices[0].get('delta', {}).get('content')
+        if delta:
+            yield delta
+
+
+class IncrementalJSONParser:
+    # Scans a streamed JSON object once, reporting each top-level field as soon
+    # as its value closes and each element of a top-level array as it closes.
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._mode = "key"
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._element_start = None
+        self._end = None
+
+    def feed(self, text):
+        self.buffer += text
+        events = []
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            c = buffer[i]
+            if self._end is not None:
+                break
+            if self._start is None:
+                if c == '{':
+                    self._start = i
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._mode == "key":
+                        self._key = json.loads(buffer[self._key_start:i + 1])
+                        self._mode = "colon"
+                continue
+
+            if self._depth == 1:
+                if self._mode == "key":
+                    if c == '"':
+                        self._in_string = True
+                        self._key_start = i
+                    elif c == '}':
+                        self._end = i
+                    continue
+                if self._mode == "colon":
+                    if c == ':':
+                        self._mode = "value"
+                        self._value_start = None
+                    continue
+                if self._value_start is None:
+                    if not c.isspace():
+                        self._value_start = i
+                elif c in ',}':
+                    self._emit(events, "field", self._key, buffer[self._value_start:i])
+                    self._mode = "key"
+                    if c == '}':
+                        self._end = i
+                    continue
+
+            if self._depth == 2 and self._element_start is None and not c.isspace() and c not in ',]':
+                self._element_start = i
+
+            if c == '"':
+                self._in_string = True
+            elif c in '{[':
+                self._depth += 1
+            elif c in '}]':
+                if self._depth == 2 and c == ']' and self._element_start is not None:
+                    self._emit(events, "item", self._key, buffer[self._element_start:i])
+                    self._element_start = None
+                self._depth -= 1
+            elif c == ',' and self._depth == 2 and self._element_start is not None:
+                self._emit(events, "item", self._key, buffer[self._element_start:i])
+                self._element_start = None
+        self._pos = len(buffer)
+        return events
+
+    def _emit(self, events, kind, key, text):
+        try:
+            events.append((kind, key, json.loads(text)))
+        except ValueError:
+            pass
+
+    def result(self):
+        if self._start is None or self._end is None:
+            return None
+        try:
+            return json.loads(self.buffer[self._start:self._end + 1])
+        except ValueError:
+            return None
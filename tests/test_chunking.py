@@ -0,0 +1,89 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from chunking import split_content
+from prompting import count_tokens
+
+BUDGET = 600
+WORDS = ("alice bob carol dana roadmap release budget review login migration database friday launch "
+         "customer design sprint blocker decision follow up").split()
+
+
+def turns(seed, count):
+    rng = random.Random(seed)
+    return [f"{rng.choice(['Alice', 'Bob', 'Carol', 'Dana'])}: "
+            + " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))) + "."
+            for _ in range(count)]
+
+
+def sentences(seed, count):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))).capitalize() + "."
+            for _ in range(count)]
+
+
+TURNS = turns(0, 1200)
+SENTENCES = sentences(1, 1200)
+
+
+def edited(lines, kind, position):
+    lines = list(lines)
+    if kind == "edit":
+        lines[position] = lines[position][:-1] + " and the budget."
+    elif kind == "insert":
+        lines.insert(position, "Bob: one more thing about the login flow.")
+    else:
+        del lines[position]
+    return lines
+
+
+def replaced(old, new):
+    # Old chunks that are not part of the unchanged run at either end
+    prefix = 0
+    while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(len(old), len(new)) - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return len(old) - prefix - suffix
+
+
+# One turn per line, and the same text as one paragraph with no speaker labels
+LAYOUTS = {"turns": ("\n", TURNS), "paragraph": (" ", SENTENCES)}
+EDITS = [(layout, kind, position) for layout in LAYOUTS for kind in ("edit", "insert", "delete")
+         for position in range(0, 1200, 40)]
+BASELINE = {layout: split_content(separator.join(lines), BUDGET) for layout, (separator, lines) in LAYOUTS.items()}
+
+
+@pytest.mark.parametrize("content", [
+    "\n".join(TURNS),
+    " ".join(SENTENCES),
+    "Alice: short.\n\n" + "x" * 20000 + "\n\nBob: " + " ".join(SENTENCES[:200]),
+    "",
+], ids=["turns", "paragraph", "unbroken", "empty"])
+def test_chunks_keep_all_text_within_budget(content):
+    chunks = split_content(content, BUDGET)
+    assert "".join("".join(chunks).split()) == "".join(content.split())
+    assert all(count_tokens(chunk) <= BUDGET * 1.05 for chunk in chunks)
+
+
+@pytest.mark.parametrize("layout, kind, position", EDITS)
+def test_one_line_edit_keeps_the_other_chunks(layout, kind, position):
+    separator, lines = LAYOUTS[layout]
+    old = BASELINE[layout]
+    new = split_content(separator.join(edited(lines, kind, position)), BUDGET)
+    assert len(old) > 50
+    assert replaced(old, new) <= 8
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_most_edits_change_a_single_chunk(layout):
+    separator, lines = LAYOUTS[layout]
+    counts = [replaced(BASELINE[layout], split_content(separator.join(edited(lines, kind, position)), BUDGET))
+              for edit_layout, kind, position in EDITS if edit_layout == layout]
+    assert sum(count <= 1 for count in counts) >= 0.8 * len(counts)
@@ -0,0 +1,53 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import transport
+from deadline import Cancelled, Deadline, DeadlineExceeded, completed, wait_for
+
+
+def test_completed_returns_as_soon_as_futures_finish():
+    deadline = Deadline(5.0)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = {pool.submit(time.sleep, 0.05): index for index in range(8)}
+        started = time.monotonic()
+        done = list(completed(futures, deadline))
+    assert len(done) == 8
+    assert time.monotonic() - started < 1.0
+
+
+def test_completed_with_no_deadline_expiry_does_not_hang():
+    future = Future()
+    future.set_result(1)
+    assert [f.result() for f in completed([future, future], Deadline())] == [1]
+    assert list(completed([], Deadline(0.0))) == []
+
+
+def test_completed_raises_when_out_of_time():
+    with pytest.raises(DeadlineExceeded):
+        list(completed([Future()], Deadline(0.05)))
+
+
+def test_completed_raises_on_cancel():
+    deadline = Deadline(5.0)
+    threading.Timer(0.05, deadline.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(Cancelled):
+        wait_for(Future(), deadline)
+    assert time.monotonic() - started < 1.0
+
+
+def test_async_call_is_aborted_on_cancel():
+    deadline = Deadline(5.0)
+    threading.Timer(0.05, deadline.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(Cancelled):
+        asyncio.run(transport._abortable(asyncio.sleep(2), deadline))
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,84 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from schema import REQUIRED, parse_json, repair_json
+
+REPLY = {
+    "meeting_summary": "Billing \"v2\" ships Friday; {braces} and [brackets] stay text.",
+    "key_decisions": ["Ship billing on Friday", "Keep the old page for a week"],
+    "action_items": [
+        {"task": "Fix the login bug", "assignee": "Bob", "due_date": "Monday", "priority": "High"},
+        {"task": "Send notes", "assignee": "Dana", "due_date": None, "priority": "Low"},
+    ],
+    "attendees": ["Alice", "Bob"],
+    "next_steps": [],
+    "blockers": ["Security review, pending"],
+    "confidence_score": "High",
+    "notes_insights": ["Latency down 12.5%", 42, True],
+}
+TEXT = json.dumps(REPLY, indent=2)
+
+
+def is_prefix(partial, full):
+    # A repair may stop early, but never invents, reorders or alters a value
+    if isinstance(full, dict):
+        keys = list(partial)
+        return (isinstance(partial, dict) and keys == list(full)[:len(keys)]
+                and all(is_prefix(partial[key], full[key]) for key in keys))
+    if isinstance(full, list):
+        return (isinstance(partial, list) and len(partial) <= len(full)
+                and all(is_prefix(a, b) for a, b in zip(partial, full)))
+    return partial == full
+
+
+@pytest.mark.parametrize("end", range(len(TEXT) + 1))
+def test_repair_at_every_cut_point(end):
+    repaired, open_key = repair_json(TEXT[:end])
+    if end == 0:
+        assert (repaired, open_key) == (None, None)
+        return
+    # Anything after the opening brace recovers something, and one more
+    # character never loses what the shorter cut already recovered
+    assert is_prefix(repaired, REPLY)
+    assert is_prefix(repair_json(TEXT[:end - 1])[0] or {}, repaired)
+    assert open_key is None or open_key in REPLY
+
+
+@pytest.mark.parametrize("end", range(len(TEXT) + 1))
+def test_parse_at_every_cut_point(end):
+    parsed, repaired = parse_json(TEXT[:end])
+    if end == len(TEXT):
+        assert (parsed, repaired) == (REPLY, False)
+        return
+    if parsed is None:
+        return
+    assert repaired
+    assert is_prefix({key: value for key, value in REPLY.items() if key in parsed}, REPLY)
+    for key, value in parsed.items():
+        if key in REQUIRED and isinstance(REPLY[key], list):
+            # A required list cut part way is dropped so it gets asked for again
+            assert value == REPLY[key]
+        else:
+            assert is_prefix(value, REPLY[key])
+
+
+@pytest.mark.parametrize("text, expected, repaired", [
+    ('{"a": 1}', {"a": 1}, False),
+    ('```json\n{"a": 1}\n```', {"a": 1}, False),
+    ('```\n{"a": [1, 2]}\n```\n', {"a": [1, 2]}, False),
+    ('Here is the analysis:\n{"a": 1}\nLet me know!', {"a": 1}, False),
+    ('{"a": [1, 2,], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}, True),
+    ('```json\n{"a": [1,\n 2,\n],\n}\n```', {"a": [1, 2]}, True),
+    ('{"a": "x,}", "b": 1}', {"a": "x,}", "b": 1}, False),
+    ('{"meeting_summary": "ok", "key_decisions": ["one", "tw', {"meeting_summary": "ok"}, True),
+    ('{"confidence_score": "High", "notes_insights": ["one", "tw', {"confidence_score": "High", "notes_insights": ["one"]}, True),
+    ('no json here', None, False),
+    ('', None, False),
+])
+def test_parse_json_replies(text, expected, repaired):
+    assert parse_json(text) == (expected, repaired)
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from similarity import SimilarityIndex
+
+
+def test_instances_sharing_a_directory_do_not_reuse_rows(tmp_path):
+    first = SimilarityIndex(directory=str(tmp_path), dim=64)
+    second = SimilarityIndex(directory=str(tmp_path), dim=64)
+    first.add(1, {"meeting_summary": "budget review for the quarter"})
+    second.add(2, {"meeting_summary": "hiring plan for the platform team"})
+
+    reloaded = SimilarityIndex(directory=str(tmp_path), dim=64)
+    assert reloaded._meta["ids"] == [1, 2]
+    assert [entry["id"] for entry in reloaded._meta["entries"]] == [1, 2]
+    assert reloaded.search("budget review for the quarter", k=1)[0]["id"] == 1
+    assert reloaded.search("hiring plan for the platform team", k=1)[0]["id"] == 2
+
+
+def test_other_writers_are_visible_without_reloading(tmp_path):
+    first = SimilarityIndex(directory=str(tmp_path), dim=64)
+    second = SimilarityIndex(directory=str(tmp_path), dim=64)
+    for meeting_id in range(100):
+        # Enough rows to make the writer grow and swap the file under the reader
+        first.add(meeting_id, {"meeting_summary": f"meeting {meeting_id} about topic{meeting_id}"})
+    assert second.stats()["meetings"] == 100
+    assert second.search("meeting 77 about topic77", k=1)[0]["id"] == 77
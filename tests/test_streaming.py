@@ -0,0 +1,104 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from streaming import IncrementalJSONParser, iter_sse_deltas
+
+REPLY = {
+    "meeting_summary": "Billing \"v2\" ships Friday, {not} a [block].",
+    "action_items": [
+        {"task": "Fix login", "assignee": "Bob", "due_date": None, "priority": "High"},
+        "Send notes, then [close] the ticket",
+        {"task": "Nested", "tags": ["a", ["b", "c"]]},
+    ],
+    "key_decisions": [],
+    "attendees": ["Alice", "Bob"],
+    "confidence_score": "High",
+    "score": -1.5e3,
+    "done": True,
+}
+TEXT = "Here you go:\n" + json.dumps(REPLY, indent=2) + "\nDone."
+
+
+def expected_events(reply):
+    # One item per closed array element, then one field per closed value
+    events = []
+    for name, value in reply.items():
+        if isinstance(value, list):
+            events += [("item", name, element) for element in value]
+        events.append(("field", name, value))
+    return events
+
+
+EXPECTED = expected_events(REPLY)
+
+
+def feed_all(pieces):
+    parser = IncrementalJSONParser()
+    events = []
+    for piece in pieces:
+        events += parser.feed(piece)
+    return parser, events
+
+
+def split_every(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def random_split(text, seed):
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(text)), 40))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("pieces", [
+    [TEXT],
+    *[split_every(TEXT, size) for size in (1, 2, 3, 5, 8, 24)],
+    *[random_split(TEXT, seed) for seed in range(5)],
+], ids=lambda pieces: f"{len(pieces)}-pieces")
+def test_events_do_not_depend_on_how_deltas_split(pieces):
+    parser, events = feed_all(pieces)
+    assert events == EXPECTED
+    assert parser.result() == REPLY
+    assert parser.buffer == TEXT
+
+
+@pytest.mark.parametrize("end", range(len(TEXT) + 1))
+def test_cut_stream_reports_only_closed_elements(end):
+    parser, events = feed_all([TEXT[:end], ""])
+    assert events == EXPECTED[:len(events)]
+    closed = json.dumps(REPLY, indent=2)
+    if end >= TEXT.index(closed) + len(closed):
+        assert events == EXPECTED
+
+
+class FakeResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def sse_lines(deltas):
+    lines = ["", ": keep-alive", 'data: {"choices": [{"delta": {"role": "assistant"}}]}']
+    for delta in deltas:
+        lines.append("data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}))
+        lines.append("")
+    lines += ["data: not json", 'data: {"choices": []}', "data: [DONE]",
+              "data: " + json.dumps({"choices": [{"delta": {"content": "after done"}}]})]
+    return lines
+
+
+@pytest.mark.parametrize("size", [1, 4, 13, len(TEXT)])
+def test_sse_deltas_reassemble_the_reply(size):
+    deltas = split_every(TEXT, size)
+    assert list(iter_sse_deltas(FakeResponse(sse_lines(deltas)))) == deltas
+    parser, events = feed_all(iter_sse_deltas(FakeResponse(sse_lines(deltas))))
+    assert events == EXPECTED
+    assert parser.result() == REPLY
@@ -0,0 +1,372 @@
+import asyncio
+import io
+import os
+import random
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from deadline import Cancelled, DeadlineExceeded, wait_for
+from ratelimit import INTERACTIVE
+
+POOL_SIZE = int(os.getenv('MEETINGMIND_POOL_SIZE', '20'))
+CONNECT_TIMEOUT = float(os.getenv('MEETINGMIND_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('MEETINGMIND_READ_TIMEOUT', '120'))
+MAX_RETRIES = int(os.getenv('MEETINGMIND_MAX_RETRIES', '4'))
+BACKOFF_BASE = float(os.getenv('MEETINGMIND_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = float(os.getenv('MEETINGMIND_BACKOFF_MAX', '30'))
+# Threads that carry blocking requests made under a deadline, so a cancel
+# returns control to the caller while the socket call winds down by itself
+SENDER_THREADS = int(os.getenv('MEETINGMIND_SENDER_THREADS', '64'))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# One session per process: Streamlit imports this module once, so every
+# browser session shares the same keep-alive pool.
+_session = None
+_session_lock = threading.Lock()
+_sender = None
+
+# Async clients are bound to the loop that created them
+_async_clients = weakref.WeakKeyDictionary()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def configure(pool_size=None, connect_timeout=None, read_timeout=None, max_retries=None):
+    global POOL_SIZE, CONNECT_TIMEOUT, READ_TIMEOUT, MAX_RETRIES, _session
+    with _session_lock:
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if connect_timeout is not None:
+            CONNECT_TIMEOUT = connect_timeout
+        if read_timeout is not None:
+            READ_TIMEOUT = read_timeout
+        if max_retries is not None:
+            MAX_RETRIES = max_retries
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, retry_after=None):
+    # Full jitter keeps sessions that failed together from retrying together
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = min(BACKOFF_MAX, retry_after) + random.uniform(0, BACKOFF_BASE)
+    return delay
+
+
+def _rewind(files, data=None):
+    if hasattr(data, 'seek'):
+        data.seek(0)
+    for value in (files or {}).values():
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if hasattr(fileobj, 'seek'):
+            fileobj.seek(0)
+
+
+class MultipartBody:
+    # A requests-style files dict encoded as multipart/form-data on demand.
+    # requests reads a files= upload into memory in one go before sending;
+    # passed as data= this is pulled block by block as the socket takes it.
+    def __init__(self, files):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._parts = []
+        for name, value in files.items():
+            filename, content = value[:2] if isinstance(value, tuple) else (None, value)
+            if filename is None and hasattr(content, 'read'):
+                filename = os.path.basename(str(getattr(content, 'name', None) or name))
+            disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+            head = f"--{boundary}\r\nContent-Disposition: {disposition}\r\n"
+            if filename:
+                head += "Content-Type: application/octet-stream\r\n"
+            self._parts.append(io.BytesIO(f"{head}\r\n".encode()))
+            if hasattr(content, 'read'):
+                self._parts.append(content)
+            else:
+                self._parts.append(io.BytesIO(content.encode() if isinstance(content, str) else content))
+            self._parts.append(io.BytesIO(b"\r\n"))
+        self._parts.append(io.BytesIO(f"--{boundary}--\r\n".encode()))
+        # Every send starts from a rewind, so the length is whole parts
+        self._length = sum(_size(part) for part in self._parts)
+        self._index = 0
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        chunks = []
+        while self._index < len(self._parts) and size:
+            chunk = self._parts[self._index].read(size)
+            if not chunk:
+                self._index += 1
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def seek(self, offset, whence=0):
+        # Only a full rewind is needed, for retries
+        for part in self._parts:
+            part.seek(0)
+        self._index = 0
+        return 0
+
+
+def _size(fileobj):
+    position = fileobj.tell()
+    end = fileobj.seek(0, 2)
+    fileobj.seek(position)
+    return end
+
+
+def _get_sender():
+    global _sender
+    if _sender is None:
+        with _session_lock:
+            if _sender is None:
+                _sender = ThreadPoolExecutor(max_workers=SENDER_THREADS, thread_name_prefix="meetingmind-http")
+    return _sender
+
+
+def _close_abandoned(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _send(session, deadline, url, **kwargs):
+    if deadline is None:
+        return session.post(url, **kwargs)
+    future = _get_sender().submit(session.post, url, **kwargs)
+    try:
+        return wait_for(future, deadline)
+    except (Cancelled, DeadlineExceeded):
+        # Nobody will read this response; hand its connection back when it lands
+        future.add_done_callback(_close_abandoned)
+        raise
+
+
+def _sleep(seconds, deadline):
+    if deadline is None:
+        time.sleep(seconds)
+    else:
+        deadline.sleep(seconds)
+
+
+async def _abortable(awaitable, deadline):
+    # The async counterpart of closing the socket: cancelling the deadline
+    # aborts whatever is awaited, from any thread
+    if deadline is None:
+        return await awaitable
+    task = asyncio.ensure_future(awaitable)
+    loop = asyncio.get_running_loop()
+    remove = deadline.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+    try:
+        return await task
+    except asyncio.CancelledError:
+        deadline.check_cancelled()
+        raise
+    finally:
+        remove()
+
+
+async def _asleep(seconds, deadline):
+    if deadline is not None:
+        remaining = deadline.remaining()
+        if remaining is not None and seconds >= remaining:
+            await _abortable(asyncio.sleep(remaining), deadline)
+            deadline.check()
+            raise DeadlineExceeded("Deadline exceeded")
+    await _abortable(asyncio.sleep(seconds), deadline)
+    if deadline is not None:
+        deadline.check()
+
+
+def post(url, headers=None, json=None, data=None, files=None, timeout=None, stream=False,
+         limiter=None, cost=0, priority=None, deadline=None):
+    # With a limiter every attempt, retries included, waits for its turn in
+    # the shared queue and 429s pause the limiter instead of this caller only.
+    # With a deadline no attempt, wait or backoff runs past it.
+    session = get_session()
+    attempt = 0
+    while True:
+        _rewind(files, data)
+        attempt_timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+        if deadline is not None:
+            deadline.check()
+            attempt_timeout = (deadline.timeout(CONNECT_TIMEOUT), deadline.timeout(READ_TIMEOUT))
+        if limiter is not None:
+            limiter.acquire(cost, priority or INTERACTIVE, deadline)
+        try:
+            response = _send(session, deadline, url, headers=headers, json=json, data=data, files=files,
+                             timeout=attempt_timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            metrics.inc("meetingmind_http_retries_total", reason=type(e).__name__)
+            _sleep(backoff_delay(attempt), deadline)
+            attempt += 1
+            continue
+
+        _observe_limits(limiter, response)
+        if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+            response.retries = attempt
+            return response
+
+        metrics.inc("meetingmind_http_retries_total", reason=str(response.status_code))
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        response.close()
+        if limiter is None or not limiter.enabled or response.status_code != 429:
+            _sleep(backoff_delay(attempt, retry_after), deadline)
+        attempt += 1
+
+
+def _observe_limits(limiter, response):
+    if limiter is None:
+        return
+    limiter.update(response.headers)
+    if response.status_code == 429:
+        limiter.throttle(parse_retry_after(response.headers.get('Retry-After')), response.headers)
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def apost(url, headers=None, json=None, data=None, files=None, timeout=None,
+                limiter=None, cost=0, priority=None, deadline=None):
+    client = get_async_client()
+    attempt = 0
+    while True:
+        _rewind(files)
+        attempt_timeout = httpx.Timeout(timeout) if timeout else client.timeout
+        if deadline is not None:
+            deadline.check()
+            attempt_timeout = httpx.Timeout(deadline.timeout(READ_TIMEOUT), connect=deadline.timeout(CONNECT_TIMEOUT))
+        if limiter is not None:
+            await limiter.acquire_async(cost, priority or INTERACTIVE, deadline)
+        try:
+            response = await _abortable(client.post(url, headers=headers, json=json, data=data, files=files,
+                                                    timeout=attempt_timeout), deadline)
+        except httpx.TransportError as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            metrics.inc("meetingmind_http_retries_total", reason=type(e).__name__)
+            await _asleep(backoff_delay(attempt), deadline)
+            attempt += 1
+            continue
+
+        _observe_limits(limiter, response)
+        if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+            response.retries = attempt
+            return response
+
+        metrics.inc("meetingmind_http_retries_total", reason=str(response.status_code))
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if limiter is None or not limiter.enabled or response.status_code != 429:
+            await _asleep(backoff_delay(attempt, retry_after), deadline)
+        attempt += 1
+
+
+class LoopSemaphore:
+    # asyncio.Semaphore binds to one loop; keep one per loop for shared agents
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+
+def get_event_loop():
+    # A single background loop lets synchronous callers (Streamlit, the
+    # thread pools) share one set of async connections
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="meetingmind-io", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run(coro, timeout=None, deadline=None):
+    # Cancelling the deadline cancels the task on the loop, which aborts any
+    # upload or request it has in flight
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    if deadline is None:
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+    remove = deadline.on_cancel(future.cancel)
+    try:
+        return future.result(deadline.remaining())
+    except FutureCancelledError:
+        deadline.check()
+        raise
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceeded("Deadline exceeded")
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        remove()